@@ -0,0 +1,106 @@
+import os
+import json
+import sqlite3
+import hashlib
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from dedup import band_keys, estimated_similarity, DEDUP_THRESHOLD
+
+# Persistent store of processed CVs. Set CV_CORPUS_PATH to an empty string to disable it.
+CV_CORPUS_PATH = os.getenv("CV_CORPUS_PATH", "cv_corpus.db")
+
+
+def text_hash(text: str) -> str:
+    """Content hash used as the corpus key."""
+    return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+
+
+class CVCorpus:
+    """SQLite-backed store of parsed CVs, their embeddings and MinHash signatures.
+
+    Each call opens its own connection so the corpus can be shared by the
+    pipeline's worker threads and by separate ingest processes.
+    """
+
+    def __init__(self, path: str = CV_CORPUS_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cvs ("
+                "key TEXT PRIMARY KEY, filename TEXT, signature BLOB, cv_json TEXT, embedding BLOB)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS lsh (band INTEGER, bucket TEXT, key TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (band, bucket)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __contains__(self, key: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM cvs WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cvs").fetchone()[0]
+
+    def add(self, key: str, filename: str, signature: np.ndarray, cv_json: dict, embedding: List[float]):
+        """Store a processed CV; existing keys are left untouched."""
+        self.add_many([(key, filename, signature, cv_json, embedding)])
+
+    def add_many(self, records: List[Tuple[str, str, np.ndarray, dict, List[float]]]):
+        """Store many (key, filename, signature, cv_json, embedding) records in one transaction."""
+        with self._connect() as conn:
+            for key, filename, signature, cv_json, embedding in records:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO cvs VALUES (?, ?, ?, ?, ?)",
+                    (key, filename, signature.tobytes(), json.dumps(cv_json),
+                     np.asarray(embedding, dtype=np.float32).tobytes()),
+                ).rowcount
+                if inserted:
+                    conn.executemany(
+                        "INSERT INTO lsh VALUES (?, ?, ?)",
+                        [(band, bucket, key) for band, bucket in band_keys(signature)],
+                    )
+
+    def get(self, key: str) -> Optional[Tuple[dict, List[float]]]:
+        """Return the stored (cv_json, embedding) for a key."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT cv_json, embedding FROM cvs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), np.frombuffer(row[1], dtype=np.float32).tolist()
+
+    def find_duplicate(self, key: str, signature: Optional[np.ndarray], threshold: float = DEDUP_THRESHOLD) -> Optional[str]:
+        """Return the key of an exact or near-duplicate CV already in the corpus.
+
+        CVs too short to have a signature never match, not even exactly.
+        """
+        if signature is None:
+            return None
+        if key in self:
+            return key
+        placeholders = " OR ".join(["(band = ? AND bucket = ?)"] * len(band_keys(signature)))
+        params = [value for band_key in band_keys(signature) for value in band_key]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT cvs.key, cvs.signature FROM lsh JOIN cvs ON cvs.key = lsh.key WHERE {placeholders}",
+                params,
+            ).fetchall()
+        best_key, best_similarity = None, threshold
+        for candidate, candidate_signature in rows:
+            similarity = estimated_similarity(signature, np.frombuffer(candidate_signature, dtype=np.uint32))
+            if similarity >= best_similarity:
+                best_key, best_similarity = candidate, similarity
+        return best_key
+
+
+def open_corpus() -> Optional[CVCorpus]:
+    """Open the configured corpus, or None when it is disabled."""
+    return CVCorpus(CV_CORPUS_PATH) if CV_CORPUS_PATH else None
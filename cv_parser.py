@@ -0,0 +1,159 @@
+import os
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from local_scoring import extract_skills, education_level
+
+# Parses below this confidence are escalated to the LLM
+CV_PARSER_CONFIDENCE = float(os.getenv("CV_PARSER_CONFIDENCE", "0.7"))
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "professional summary", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "internships", "internship"],
+    "education": ["education", "academic background", "academics", "qualifications", "educational qualifications"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "technologies", "tech stack"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "certifications": ["certifications", "certificates", "courses", "licenses"],
+}
+HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+HEADING_PATTERN = re.compile(
+    r"^\s*(" + "|".join(re.escape(a) for a in sorted(HEADING_LOOKUP, key=len, reverse=True)) + r")\s*:?\s*$",
+    re.IGNORECASE,
+)
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_DATE = r"(?:(?P<{p}month>jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?,?\s*|(?P<{p}num>\d{{1,2}})[/-])?(?P<{p}year>(?:19|20)\d{{2}})"
+DATE_RANGE_PATTERN = re.compile(
+    _DATE.format(p="s") + r"\s*(?:-|–|—|to|till|until)\s*(?:(?P<present>present|current|now|till date|ongoing|today)|"
+    + _DATE.format(p="e") + ")",
+    re.IGNORECASE,
+)
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{8,}\d")
+# Phone candidates need this many digits and must not be a year range ("2015 - 2018")
+PHONE_MIN_DIGITS = 9
+YEAR_RANGE_PATTERN = re.compile(r"(?:19|20)\d\d\s*[-–]\s*(?:19|20)\d\d")
+NAME_PATTERN = re.compile(r"^[A-Z][a-zA-Z.'-]+(?:\s+[A-Z][a-zA-Z.'-]+){1,3}$")
+
+
+def split_sections(text: str) -> Dict[str, List[str]]:
+    """Group the lines of a CV under their section headings ("header" for the top)."""
+    sections = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            current = HEADING_LOOKUP[heading.group(1).lower()]
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return sections
+
+
+def find_phone(text: str) -> Optional[str]:
+    """Return the first phone-number-like string in the text."""
+    for match in PHONE_PATTERN.finditer(text):
+        candidate = match.group().strip()
+        if sum(ch.isdigit() for ch in candidate) >= PHONE_MIN_DIGITS and not YEAR_RANGE_PATTERN.fullmatch(candidate):
+            return candidate
+    return None
+
+
+def _month_index(month: Optional[str], num: Optional[str], year: str) -> int:
+    if month:
+        month_number = MONTHS[month[:3].lower()]
+    elif num and 1 <= int(num) <= 12:
+        month_number = int(num)
+    else:
+        month_number = 1
+    return int(year) * 12 + month_number - 1
+
+
+def experience_years(lines: List[str], today: Optional[date] = None) -> Tuple[float, int]:
+    """Sum the date ranges in the lines (overlaps merged) into years.
+
+    Ranges ending in a month (or "present") include that month, so
+    "Jan 2019 - Dec 2019" is a full year; year-only ranges such as
+    "2015 - 2018" count from January to January. Returns the years and the
+    number of date ranges found.
+    """
+    today = today or date.today()
+    intervals = []
+    for match in DATE_RANGE_PATTERN.finditer("\n".join(lines)):
+        start = _month_index(match.group("smonth"), match.group("snum"), match.group("syear"))
+        if match.group("present"):
+            end = today.year * 12 + today.month
+        else:
+            end = _month_index(match.group("emonth"), match.group("enum"), match.group("eyear"))
+            if match.group("emonth") or (match.group("enum") and 1 <= int(match.group("enum")) <= 12):
+                end += 1
+        if end >= start:
+            intervals.append((start, end))
+
+    months = 0
+    last_end = None
+    for start, end in sorted(intervals):
+        if last_end is not None and start <= last_end:
+            if end > last_end:
+                months += end - last_end
+                last_end = end
+            continue
+        months += end - start
+        last_end = end
+    return round(months / 12, 1), len(intervals)
+
+
+def parse_cv(text: str) -> Tuple[Dict, float]:
+    """Parse CV text with heuristics, without any network I/O.
+
+    Returns a JSON-compatible dict in the same shape the LLM extraction
+    produces (including "total_experience" in years) and a confidence
+    between 0 and 1.
+    """
+    sections = split_sections(text)
+    email = EMAIL_PATTERN.search(text)
+    phone = find_phone(text)
+    name = next((line for line in sections["header"][:3] if NAME_PATTERN.match(line)), None)
+
+    skills_text = "\n".join(sections.get("skills", [])) or text
+    skills = sorted(extract_skills(skills_text))
+    education = sections.get("education", [])
+    level = education_level("\n".join(education) or text)
+    # Project dates are not counted as experience
+    total_experience, ranges = experience_years(sections.get("experience", []))
+
+    cv_json = {
+        "name": name,
+        "email": email.group() if email else None,
+        "phone": phone,
+        "summary": " ".join(sections.get("summary", [])),
+        "skills": skills,
+        "experience": sections.get("experience", []),
+        "education": education,
+        "projects": sections.get("projects", []),
+        "certifications": sections.get("certifications", []),
+        "total_experience": total_experience,
+    }
+
+    confidence = 0.0
+    if "experience" in sections:
+        confidence += 0.35 if ranges else 0.1
+    if email:
+        confidence += 0.1
+    if len(skills) >= 3:
+        confidence += 0.2
+    elif skills:
+        confidence += 0.1
+    if level is not None:
+        confidence += 0.2
+    if name:
+        confidence += 0.05
+    if len(sections) - 1 >= 3:
+        confidence += 0.1
+
+    return cv_json, round(confidence, 2)
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import List, Optional
+
+# Starting estimates (seconds) for the stages a deadline can skip. They are
+# refined with the observed durations of every completed call.
+STAGE_ESTIMATES = {
+    "llm_extraction": 3.0,
+    "llm_rerank": 5.0,
+    "llm_scoring": 6.0,
+}
+_SMOOTHING = 0.3
+_lock = threading.Lock()
+
+
+def record_stage_duration(stage: str, duration: float):
+    """Fold an observed stage duration into its running estimate."""
+    with _lock:
+        previous = STAGE_ESTIMATES.get(stage, duration)
+        STAGE_ESTIMATES[stage] = (1 - _SMOOTHING) * previous + _SMOOTHING * duration
+
+
+class Deadline:
+    """Time budget for one request, shared by every pipeline stage.
+
+    Stages ask ``allows(stage)`` before starting expensive work and call
+    ``skip(stage)`` when they fall back to a cheaper path, so the caller can
+    report which stages were degraded. A deadline of None never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.skipped: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the budget, or None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def allows(self, stage: str) -> bool:
+        """Whether the stage's estimated duration still fits in the budget."""
+        remaining = self.remaining()
+        return remaining is None or remaining >= STAGE_ESTIMATES.get(stage, 0.0)
+
+    def skip(self, stage: str):
+        """Record that a stage was skipped or degraded."""
+        with self._lock:
+            if stage not in self.skipped:
+                self.skipped.append(stage)
@@ -0,0 +1,134 @@
+import os
+import re
+import zlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+
+# MinHash / LSH settings. 16 bands of 8 rows put the LSH candidate threshold
+# near 0.7 Jaccard; candidates are then checked against DEDUP_THRESHOLD.
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+# Texts with fewer shingles (e.g. scanned PDFs without a text layer) are
+# never treated as duplicates of anything
+MIN_SHINGLES = 3
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+# Fixed seed so signatures stay comparable with the persistent corpus
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    """Word k-shingles of the normalized text."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of the text's shingles as a uint32 array.
+
+    Returns None when the text has fewer than MIN_SHINGLES shingles, since
+    such texts would all look alike.
+    """
+    text_shingles = shingles(text)
+    if len(text_shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in text_shingles), dtype=np.uint64)
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def band_keys(signature: np.ndarray) -> List[Tuple[int, str]]:
+    """LSH bucket key for every band of the signature."""
+    return [
+        (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes().hex())
+        for band in range(LSH_BANDS)
+    ]
+
+
+class LSHIndex:
+    """In-memory, thread-safe LSH index over MinHash signatures."""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[Tuple[int, str], List[str]] = {}
+        self.orders: Dict[str, int] = {}
+        # Representatives replaced by an earlier-ordered near-duplicate
+        self.superseded: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _query(self, signature: np.ndarray) -> Optional[str]:
+        candidates = set()
+        for band_key in band_keys(signature):
+            candidates.update(self.buckets.get(band_key, ()))
+        best_key, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = estimated_similarity(signature, self.signatures[key])
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key
+
+    def query(self, signature: np.ndarray) -> Optional[str]:
+        """Return the key of the most similar indexed document above the threshold."""
+        with self._lock:
+            return self._query(signature)
+
+    def add(self, key: str, signature: np.ndarray):
+        with self._lock:
+            self._add(key, signature)
+
+    def _add(self, key: str, signature: np.ndarray, order: Optional[int] = None):
+        self.signatures[key] = signature
+        if order is not None:
+            self.orders[key] = order
+        for band_key in band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def _remove(self, key: str):
+        signature = self.signatures.pop(key)
+        self.orders.pop(key, None)
+        for band_key in band_keys(signature):
+            self.buckets[band_key].remove(key)
+
+    def query_or_add(self, key: str, signature: Optional[np.ndarray], order: Optional[int] = None) -> Optional[str]:
+        """Atomically return a near-duplicate's key, or index the document and return None.
+
+        Documents without a signature are never indexed or matched. With an
+        ``order`` (e.g. the upload position), a document that matches a
+        later-ordered representative replaces it instead: the replaced key is
+        recorded in ``superseded`` and None is returned, so the representative
+        does not depend on which document reached the index first.
+        """
+        if signature is None:
+            return None
+        with self._lock:
+            duplicate = self._query(signature)
+            if duplicate is not None and order is not None and order < self.orders.get(duplicate, order):
+                self._remove(duplicate)
+                self.superseded[duplicate] = key
+                duplicate = None
+            if duplicate is None:
+                self._add(key, signature, order)
+            return duplicate
+
+    def representative(self, key: str) -> str:
+        """Follow ``superseded`` to the key that now represents ``key``."""
+        with self._lock:
+            while key in self.superseded:
+                key = self.superseded[key]
+            return key
@@ -0,0 +1,102 @@
+import os
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from profiling import bind_to_request
+
+# Pool sizes and queue-depth limits. Work beyond size + queue waits for a
+# free slot; new requests are rejected with PoolSaturated while a pool is full.
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", str(os.cpu_count() or 1)))
+PARSE_POOL_QUEUE = int(os.getenv("PARSE_POOL_QUEUE", str(4 * PARSE_POOL_SIZE)))
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 1)))
+CPU_POOL_QUEUE = int(os.getenv("CPU_POOL_QUEUE", str(4 * CPU_POOL_SIZE)))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+LLM_POOL_QUEUE = int(os.getenv("LLM_POOL_QUEUE", "64"))
+# Pipeline requests running at the same time; further requests get a 503
+MAX_PIPELINE_REQUESTS = int(os.getenv("MAX_PIPELINE_REQUESTS", "8"))
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when a request cannot be admitted because the server is at capacity."""
+
+
+class BoundedExecutor:
+    """Thread or process pool that holds at most ``max_workers + max_queue`` pending tasks.
+
+    ``submit`` blocks while the pool is full, so a request's fan-out waits
+    for capacity instead of failing halfway through. With ``processes`` the
+    tasks run in spawned worker processes: functions and arguments must be
+    picklable, and the work is not sampled by request profiling.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, processes: bool = False):
+        self.name = name
+        self.processes = processes
+        self.limit = max(1, max_workers) + max(0, max_queue)
+        self.pending = 0
+        self._not_full = threading.Condition()
+        if processes:
+            self._executor = ProcessPoolExecutor(max_workers=max(1, max_workers),
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=name)
+
+    def saturated(self) -> bool:
+        return self.pending >= self.limit
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._not_full:
+            while self.pending >= self.limit:
+                self._not_full.wait()
+            self.pending += 1
+        try:
+            future = self._executor.submit(fn if self.processes else bind_to_request(fn), *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._not_full:
+            self.pending -= 1
+            self._not_full.notify()
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn`` on the pool and wait for its result.
+
+        Must not be called from a task already running on the same pool.
+        """
+        return self.submit(fn, *args, **kwargs).result()
+
+
+# Text extraction, rule-based parsing and MinHash: pure Python that holds the
+# GIL, so it runs in worker processes
+parse_executor = BoundedExecutor("parse", PARSE_POOL_SIZE, PARSE_POOL_QUEUE, processes=True)
+# Embedding and similarity: numpy and torch release the GIL
+cpu_executor = BoundedExecutor("cpu", CPU_POOL_SIZE, CPU_POOL_QUEUE)
+# Blocking LLM HTTP calls
+llm_executor = BoundedExecutor("llm", LLM_POOL_SIZE, LLM_POOL_QUEUE)
+
+
+_request_slots = threading.BoundedSemaphore(max(1, MAX_PIPELINE_REQUESTS))
+
+
+def pools_saturated() -> bool:
+    return parse_executor.saturated() or cpu_executor.saturated() or llm_executor.saturated()
+
+
+@contextmanager
+def admit_request():
+    """Reserve one of the MAX_PIPELINE_REQUESTS pipeline slots for a request.
+
+    Raises PoolSaturated when no slot is free or a pool is already full, so
+    load is shed before any work starts and never in the middle of a request.
+    """
+    if pools_saturated() or not _request_slots.acquire(blocking=False):
+        raise PoolSaturated("Server is at capacity, retry later")
+    try:
+        yield
+    finally:
+        _request_slots.release()
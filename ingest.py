@@ -0,0 +1,200 @@
+"""Bulk-ingest a directory of CVs (PDF, DOCX, TXT) into the persistent CV corpus.
+
+PDF parsing, local CV parsing and MinHash signatures run on a process pool
+and embeddings use sentence-transformers' multi-process encoding, so the
+CPU stages scale with cores. Progress is checkpointed to a manifest after
+every chunk; re-running the same command resumes where it stopped.
+
+    python ingest.py /data/cv-archive --workers 8 --chunk-size 512
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+import timeit
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Set
+from cv_parser import parse_cv, CV_PARSER_CONFIDENCE
+from dedup import LSHIndex, minhash_signature
+from corpus import CVCorpus, CV_CORPUS_PATH, text_hash
+from text_extraction import extract_text
+
+CV_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Manifest statuses that are not retried on resume; deferred CVs are
+# retried when the LLM is enabled
+DONE_STATUSES = {"stored", "exists", "duplicate", "deferred", "too_short"}
+# Same embedding model as the ranking path, so stored embeddings are comparable
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def iter_cv_files(directory: str) -> Iterator[str]:
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(CV_EXTENSIONS):
+                yield os.path.abspath(os.path.join(root, name))
+
+
+def load_manifest(path: str, statuses: Set[str] = DONE_STATUSES) -> Set[str]:
+    """Paths already handled by a previous run."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run interrupted mid-write leaves a partial last line
+                continue
+            if entry.get("status") in statuses:
+                done.add(entry["path"])
+    return done
+
+
+def append_manifest(path: str, entries: List[Dict]):
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def parse_file(path: str) -> Dict:
+    """Extract, parse and sign one CV file (runs in a worker process)."""
+    try:
+        text = extract_text(path)
+        if not text:
+            return {"path": path, "status": "error", "error": "No text extracted"}
+        cv_json, confidence = parse_cv(text)
+        return {
+            "path": path, "key": text_hash(text), "text": text, "cv_json": cv_json,
+            "confidence": confidence, "signature": minhash_signature(text),
+        }
+    except Exception as e:
+        return {"path": path, "status": "error", "error": str(e)}
+
+
+def chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def escalate_to_llm(parsed: List[Dict], workers: int) -> List[Dict]:
+    """Run the LLM extraction for low-confidence parses (I/O bound, so threads)."""
+    from rank_cv import generate_json_from_text
+
+    def extract(item):
+        try:
+            item["cv_json"], _, _ = generate_json_from_text(item["text"])
+        except Exception as e:
+            item["status"], item["error"] = "error", str(e)
+        return item
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extract, parsed))
+
+
+def ingest_chunk(paths: List[str], parse_pool, embed, corpus: CVCorpus, batch_index: LSHIndex, args) -> List[Dict]:
+    """Process one chunk end to end and return its manifest entries."""
+    parsed = list(parse_pool.map(parse_file, paths, chunksize=max(1, len(paths) // (args.workers * 4))))
+    entries, to_embed, low_confidence = [], [], []
+
+    for item in parsed:
+        if item.get("status") == "error":
+            entries.append({"path": item["path"], "status": "error", "error": item["error"]})
+            continue
+        if item["signature"] is None:
+            # Too little text to deduplicate, so it could never be matched from the corpus
+            entries.append({"path": item["path"], "status": "too_short", "key": item["key"]})
+            continue
+        duplicate_of = corpus.find_duplicate(item["key"], item["signature"])
+        if duplicate_of is None:
+            duplicate_of = batch_index.query_or_add(item["key"], item["signature"])
+        if duplicate_of == item["key"]:
+            entries.append({"path": item["path"], "status": "exists", "key": item["key"]})
+        elif duplicate_of is not None:
+            entries.append({"path": item["path"], "status": "duplicate", "key": item["key"], "duplicate_of": duplicate_of})
+        elif item["confidence"] >= CV_PARSER_CONFIDENCE:
+            to_embed.append(item)
+        elif args.llm:
+            low_confidence.append(item)
+        else:
+            # Left for the ranking path, which escalates it to the LLM on demand
+            entries.append({"path": item["path"], "status": "deferred", "key": item["key"]})
+
+    if low_confidence:
+        for item in escalate_to_llm(low_confidence, args.llm_workers):
+            if item.get("status") == "error":
+                entries.append({"path": item["path"], "status": "error", "error": item["error"]})
+            else:
+                to_embed.append(item)
+
+    if to_embed:
+        embeddings = embed([json.dumps(item["cv_json"]) for item in to_embed])
+        corpus.add_many([
+            (item["key"], os.path.basename(item["path"]), item["signature"], item["cv_json"], embedding)
+            for item, embedding in zip(to_embed, embeddings)
+        ])
+        entries += [{"path": item["path"], "status": "stored", "key": item["key"]} for item in to_embed]
+
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="Directory to walk for CV files")
+    parser.add_argument("--corpus", default=CV_CORPUS_PATH or "cv_corpus.db", help="Corpus database to write into")
+    parser.add_argument("--manifest", default="ingest_manifest.jsonl", help="Checkpoint manifest used to resume")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for PDF parsing")
+    parser.add_argument("--embed-workers", type=int, default=os.cpu_count() or 1, help="Processes for embedding")
+    parser.add_argument("--chunk-size", type=int, default=512, help="CVs per checkpoint")
+    parser.add_argument("--llm", action="store_true", help="Escalate low-confidence parses to the LLM during ingest")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent LLM extractions with --llm")
+    args = parser.parse_args(argv)
+
+    done = load_manifest(args.manifest, DONE_STATUSES - {"deferred"} if args.llm else DONE_STATUSES)
+    paths = [path for path in iter_cv_files(args.directory) if path not in done]
+    print(f"{len(done)} CVs already ingested, {len(paths)} to go")
+    if not paths:
+        return
+
+    corpus = CVCorpus(args.corpus)
+    batch_index = LSHIndex()
+    counts = {}
+    start_time = timeit.default_timer()
+
+    # Spawn the parse workers before the embedding model is loaded so they stay light
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as parse_pool:
+        from sentence_transformers import SentenceTransformer
+        embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+
+        pool = None
+        if args.embed_workers > 1:
+            pool = embedding_model.start_multi_process_pool(target_devices=["cpu"] * args.embed_workers)
+            embed = lambda texts: embedding_model.encode_multi_process(texts, pool).tolist()
+        else:
+            embed = lambda texts: embedding_model.encode(texts).tolist()
+
+        try:
+            processed = 0
+            for chunk in chunks(paths, args.chunk_size):
+                entries = ingest_chunk(chunk, parse_pool, embed, corpus, batch_index, args)
+                append_manifest(args.manifest, entries)
+                for entry in entries:
+                    counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+                processed += len(chunk)
+                elapsed = timeit.default_timer() - start_time
+                print(f"{processed}/{len(paths)} CVs ({processed / elapsed:.1f} CVs/s) {counts}")
+        finally:
+            if pool is not None:
+                embedding_model.stop_multi_process_pool(pool)
+
+    print(f"Done in {timeit.default_timer() - start_time:.1f}s: {counts}")
+    if counts.get("error"):
+        print(f"{counts['error']} CVs failed and will be retried on the next run", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Load-test the FastAPI service with the LLM replaced by a local stub.
+
+Runs ``main_api.app`` in-process (ASGI transport) or as a local uvicorn
+worker, drives /jd-cvs and /score-jds at a given concurrency and batch size
+and prints throughput, latency percentiles, error rate and worker RSS as JSON.
+
+    python load_test.py --endpoint jd-cvs --concurrency 8 --requests 100 --batch-size 10 --llm-latency 0.5
+
+Every request must cost a full pipeline run, or throughput is inflated by
+about the concurrency level. Synthetic documents are unique per request.
+Files from --cv-dir / --jd-dir are renamed per request. Their text still
+repeats, so request coalescing and near-duplicate collapsing are turned off
+unless --coalesce is given.
+"""
+import os
+import re
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import contextlib
+import subprocess
+from typing import Dict, List, Optional
+
+# Keep load-test runs out of the persistent corpus and away from the real API
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+os.environ["CV_CORPUS_PATH"] = ""
+
+import httpx
+
+WORDS = [
+    "python", "pytorch", "aws", "docker", "sql", "kubernetes", "spark", "react", "django", "nlp",
+    "team", "lead", "built", "designed", "scaled", "deployed", "platform", "pipeline", "service", "model",
+]
+
+
+class StubResponse(dict):
+    """Minimal stand-in for a litellm response (dict and attribute access)."""
+
+    def __init__(self, content: str):
+        super().__init__(usage={"prompt_tokens": 0, "completion_tokens": 0})
+        message = type("Message", (), {"content": content})()
+        self.choices = [type("Choice", (), {"message": message})()]
+
+
+def make_stub_completion(latency: float, jitter: float):
+    """Build a completion() replacement that sleeps and returns plausible JSON."""
+
+    def completion(model=None, messages=None, **kwargs):
+        time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+        prompt = messages[0]["content"]
+        if '"ranked_cvs"' in prompt:
+            # Only the CV data block, not the example output format
+            cv_data = prompt.split("CV Data:", 1)[-1].split("Return the result", 1)[0]
+            filenames = list(dict.fromkeys(re.findall(r'"filename": "([^"]+)"', cv_data)))
+            content = {"ranked_cvs": [{"filename": f, "ranking": str(i + 1)} for i, f in enumerate(filenames)]}
+        elif "Match_score" in prompt:
+            content = {"Match_score": round(random.uniform(40, 95), 2)}
+        else:
+            content = {"skills": random.sample(WORDS, 5), "total_experience": random.randint(0, 15)}
+        return StubResponse(json.dumps(content))
+
+    return completion
+
+
+def install_llm_stub(latency: float, jitter: float, scoring_pause: float = 0.0):
+    """Patch the completion() used by the pipeline modules.
+
+    The rate-limit pause before each scoring call is replaced too, so the
+    stub latency is the only LLM cost.
+    """
+    import rank_cv
+    import score_jd
+
+    stub = make_stub_completion(latency, jitter)
+    rank_cv.completion = stub
+    score_jd.completion = stub
+    score_jd.LLM_SCORING_PAUSE = scoring_pause
+
+
+def _escape_pdf(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: List[str]) -> bytes:
+    """Build a one-page text PDF without any third-party dependency."""
+    text_ops = " ".join(f"({_escape_pdf(line)}) '" for line in lines[:60])
+    stream = f"BT /F1 10 Tf 50 800 Td 12 TL {text_ops} ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 5 0 R /Resources << /Font << /F1 4 0 R >> >> >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def synthetic_cv(index: int) -> bytes:
+    rng = random.Random(index)
+    start = rng.randint(2005, 2020)
+    lines = [
+        f"Candidate {index}", f"candidate{index}@example.com",
+        "Experience", f"Engineer at Company{index} Jan {start} - Present",
+        " ".join(rng.choices(WORDS, k=40)),
+        "Education", "B.Tech Computer Science",
+        "Skills", ", ".join(rng.sample(WORDS[:10], 5)),
+    ]
+    return make_pdf(lines)
+
+
+def synthetic_jd(index: int) -> bytes:
+    rng = random.Random(-index - 1)
+    return make_pdf([
+        f"Job {index}: Machine Learning Engineer",
+        f"We need {rng.randint(2, 8)}+ years of experience with " + ", ".join(rng.sample(WORDS[:10], 4)),
+        "Bachelor degree required.", " ".join(rng.choices(WORDS, k=30)),
+    ])
+
+
+def load_files(directory: Optional[str]) -> List[tuple]:
+    if not directory:
+        return []
+    return [
+        (name, open(os.path.join(directory, name), "rb").read())
+        for name in sorted(os.listdir(directory)) if name.lower().endswith(".pdf")
+    ]
+
+
+def build_request(endpoint: str, index: int, batch_size: int, cv_files: List[tuple], jd_files: List[tuple]):
+    """Multipart files for one request; synthetic documents are unique per request,
+    real ones get a per-request filename prefix."""
+    def real(files, i):
+        name, content = files[i % len(files)]
+        return f"{index}_{i}_{name}", content
+
+    def cv(i):
+        return real(cv_files, i) if cv_files else (f"cv_{index}_{i}.pdf", synthetic_cv(index * batch_size + i))
+
+    def jd(i):
+        return real(jd_files, i) if jd_files else (f"jd_{index}_{i}.pdf", synthetic_jd(index * batch_size + i))
+
+    if endpoint == "jd-cvs":
+        name, content = jd(0)
+        files = [("jd", (name, content, "application/pdf"))]
+        files += [("cvs", (n, c, "application/pdf")) for n, c in (cv(i) for i in range(batch_size))]
+    else:
+        name, content = cv(0)
+        files = [("cv", (name, content, "application/pdf"))]
+        files += [("jds", (n, c, "application/pdf")) for n, c in (jd(i) for i in range(batch_size))]
+    return files
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Current resident set size of a process (Linux /proc)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    index = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1
+    return round(ordered[index], 4)
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: str, args, cv_files, jd_files, worker_pid: int) -> Dict:
+    """Drive one endpoint and summarize the run."""
+    queue = asyncio.Queue()
+    for index in range(args.requests):
+        queue.put_nowait(index)
+    latencies, errors, statuses = [], 0, {}
+    rss_samples = []
+
+    async def sample_rss():
+        while True:
+            rss = rss_bytes(worker_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.2)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            index = queue.get_nowait()
+            files = build_request(endpoint, index, args.batch_size, cv_files, jd_files)
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/{endpoint}", files=files, timeout=args.timeout)
+                status = str(response.status_code)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception as e:
+                status = type(e).__name__
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    return {
+        "endpoint": f"/{endpoint}",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 3) if elapsed else None,
+        "latency_s": {
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(max(latencies), 4) if latencies else None,
+        },
+        "error_rate": round(errors / args.requests, 4) if args.requests else 0.0,
+        "status_counts": statuses,
+        "worker_rss_bytes": {
+            "start": rss_samples[0] if rss_samples else None,
+            "peak": max(rss_samples) if rss_samples else None,
+            "end": rss_samples[-1] if rss_samples else None,
+        },
+    }
+
+
+def serve(args):
+    """Run the app under uvicorn with the LLM stub installed (used by --mode uvicorn)."""
+    import uvicorn
+
+    install_llm_stub(args.llm_latency, args.llm_jitter, args.scoring_pause)
+    from main_api import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+async def wait_until_ready(base_url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+async def main_async(args) -> Dict:
+    cv_files = load_files(args.cv_dir)
+    jd_files = load_files(args.jd_dir)
+    endpoints = ["jd-cvs", "score-jds"] if args.endpoint == "both" else [args.endpoint]
+
+    server = None
+    if args.mode == "inprocess":
+        install_llm_stub(args.llm_latency, args.llm_jitter, args.scoring_pause)
+        from main_api import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+        worker_pid = os.getpid()
+    else:
+        server = subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port),
+            "--llm-latency", str(args.llm_latency), "--llm-jitter", str(args.llm_jitter),
+            "--scoring-pause", str(args.scoring_pause),
+        ])
+        base_url = f"http://127.0.0.1:{args.port}"
+        await wait_until_ready(base_url)
+        client = httpx.AsyncClient(base_url=base_url)
+        worker_pid = server.pid
+
+    try:
+        runs = [await run_endpoint(client, endpoint, args, cv_files, jd_files, worker_pid) for endpoint in endpoints]
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return {
+        "mode": args.mode,
+        "llm_latency_s": args.llm_latency,
+        "llm_jitter_s": args.llm_jitter,
+        "scoring_pause_s": args.scoring_pause,
+        "coalescing": args.coalesce or not (args.cv_dir or args.jd_dir),
+        "harness_peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "runs": runs,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--endpoint", choices=["jd-cvs", "score-jds", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=5, help="CVs per /jd-cvs request, JDs per /score-jds request")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Uniform +/- jitter on the stub latency")
+    parser.add_argument("--scoring-pause", type=float, default=0.0,
+                        help="Rate-limit pause before each JD scoring call (the service uses 4 s)")
+    parser.add_argument("--cv-dir", help="Directory of real CV PDFs (synthetic CVs are generated otherwise)")
+    parser.add_argument("--jd-dir", help="Directory of real JD PDFs (synthetic JDs are generated otherwise)")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Keep request coalescing and near-duplicate collapsing on for repeated real files")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if (args.cv_dir or args.jd_dir) and not args.coalesce:
+        # Read at import by the service modules; inherited by the uvicorn worker
+        os.environ["COALESCE_REQUESTS"] = "0"
+        # Estimated similarity never reaches 2, so nothing is collapsed
+        os.environ["DEDUP_THRESHOLD"] = "2"
+    if args.serve:
+        serve(args)
+    else:
+        # Pipeline progress prints go to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(main_async(args))
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output)
+        else:
+            print(output)
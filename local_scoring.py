@@ -0,0 +1,159 @@
+import re
+import json
+from typing import Dict, Optional, Set
+
+# Keyword tables used to pull structured data out of CVs and JDs.
+# Entries are lowercase; matching is done on word boundaries. Words that are
+# also common English ("go", "rest", "excel") are left out on purpose.
+SKILL_KEYWORDS = {
+    # Languages
+    "python", "java", "javascript", "typescript", "c++", "c#", "golang", "rust", "scala",
+    "kotlin", "ruby", "php", "matlab", "sql", "bash", "perl",
+    # ML / data
+    "machine learning", "deep learning", "nlp", "natural language processing", "computer vision",
+    "pytorch", "tensorflow", "keras", "scikit-learn", "sklearn", "xgboost", "lightgbm", "pandas", "numpy",
+    "spark", "pyspark", "hadoop", "airflow", "mlflow", "llm", "llms", "transformers", "hugging face",
+    "langchain", "rag", "generative ai", "genai", "opencv", "statistics", "data analysis", "data science",
+    "tableau", "power bi", "microsoft excel",
+    # Web / backend
+    "django", "flask", "fastapi", "spring boot", "node.js", "nodejs", "react", "angular", "vue",
+    "html", "css", "rest api", "rest apis", "graphql", "microservices", ".net",
+    # Data stores
+    "postgresql", "postgres", "mysql", "mongodb", "redis", "elasticsearch", "cassandra", "snowflake",
+    "bigquery", "dynamodb",
+    # Infra
+    "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "jenkins", "ci/cd", "git", "linux",
+}
+
+# Normalized education ladder; a higher level satisfies every lower one.
+# "master", "associate" and "secondary" only count in a degree context, since
+# on their own they appear in job titles ("Scrum Master", "Associate Engineer").
+EDUCATION_LADDER = {
+    "high school": 1, "secondary school": 1, "higher secondary": 1,
+    "diploma": 2, "associate degree": 2, "associate's degree": 2, "associate’s degree": 2,
+    "bachelor": 3, "bachelors": 3, "b.tech": 3, "btech": 3, "b.e": 3, "b.sc": 3, "bsc": 3, "b.s": 3,
+    "bca": 3, "undergraduate": 3,
+    "master's": 4, "master’s": 4, "masters degree": 4, "master degree": 4, "master of": 4,
+    "masters in": 4, "m.tech": 4, "mtech": 4, "m.sc": 4, "msc": 4, "m.s": 4, "mba": 4,
+    "mca": 4, "postgraduate": 4,
+    "phd": 5, "ph.d": 5, "doctorate": 5,
+}
+
+INDUSTRY_KEYWORDS = {
+    "fintech", "finance", "banking", "insurance", "healthcare", "pharma", "e-commerce", "ecommerce",
+    "retail", "logistics", "telecom", "edtech", "gaming", "automotive", "manufacturing",
+    "saas", "cybersecurity", "media", "advertising", "adtech", "energy", "real estate", "travel",
+}
+
+
+def _keyword_pattern(keywords) -> re.Pattern:
+    # Longest first so "spring boot" wins over "spring"
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"(?<![\w+#.])(?:{alternation})(?![\w+#])", re.IGNORECASE)
+
+
+SKILL_PATTERN = _keyword_pattern(SKILL_KEYWORDS)
+EDUCATION_PATTERN = _keyword_pattern(EDUCATION_LADDER)
+INDUSTRY_PATTERN = _keyword_pattern(INDUSTRY_KEYWORDS)
+# "N years" only counts as a requirement when followed by "of"/"in"/"experience"...
+# or preceded by "experience", so "a company with 2 yrs history" is ignored
+_YEARS = r"(\d+(?:\.\d+)?)\s*\+?\s*(?:(?:-|to)\s*\d+(?:\.\d+)?\s*\+?\s*)?(?:years?|yrs?)\b"
+JD_EXPERIENCE_PATTERN = re.compile(
+    rf"{_YEARS}['’]?\s+(?:of|in|experience|exp|working|hands-on|professional|relevant|industry)\b"
+    rf"|experience[^.\d]{{0,30}}?{_YEARS}",
+    re.IGNORECASE,
+)
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def extract_skills(text: str) -> Set[str]:
+    """Return the set of known skills mentioned in the text."""
+    return {m.lower() for m in SKILL_PATTERN.findall(text)}
+
+
+def extract_industries(text: str) -> Set[str]:
+    """Return the set of known industries mentioned in the text."""
+    return {m.lower() for m in INDUSTRY_PATTERN.findall(text)}
+
+
+def education_level(text: str) -> Optional[int]:
+    """Return the highest education level mentioned in the text, if any."""
+    levels = [EDUCATION_LADDER[m.lower()] for m in EDUCATION_PATTERN.findall(text)]
+    return max(levels) if levels else None
+
+
+def required_experience(jd_text: str) -> Optional[float]:
+    """Return the years of experience a JD asks for, if stated.
+
+    The largest requirement wins, and a range counts as its lower bound.
+    """
+    years = [float(forward or backward) for forward, backward in JD_EXPERIENCE_PATTERN.findall(jd_text)]
+    return max(years) if years else None
+
+
+def parse_years(value) -> Optional[float]:
+    """Convert a total_experience value ("5", 5, "5.5 years") to float years."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_PATTERN.search(value)
+        if match:
+            return float(match.group())
+    return None
+
+
+def cv_profile(cv_json: dict) -> Dict:
+    """Build a scoring profile from the structured CV JSON."""
+    text = json.dumps(cv_json)
+    return {
+        "skills": extract_skills(text),
+        "experience": parse_years(cv_json.get("total_experience")),
+        "education": education_level(text),
+        "industries": extract_industries(text),
+    }
+
+
+def jd_profile(jd_text: str) -> Dict:
+    """Build a scoring profile from the JD text."""
+    return {
+        "skills": extract_skills(jd_text),
+        "experience": required_experience(jd_text),
+        "education": education_level(jd_text),
+        "industries": extract_industries(jd_text),
+    }
+
+
+def score_locally(cv: Dict, jd: Dict) -> Optional[float]:
+    """Apply the PROMPT_TEMPLATE formula in-process.
+
+    Returns the match score (0-100), or None when the structured data is
+    too incomplete to score deterministically and the LLM should be used.
+    """
+    if not jd["skills"] or cv["experience"] is None:
+        return None
+    if jd["education"] is not None and cv["education"] is None:
+        return None
+
+    # Skill Match
+    skill_match = len(cv["skills"] & jd["skills"]) / len(jd["skills"]) * 100
+
+    # Experience Match
+    if jd["experience"]:
+        experience_match = min(cv["experience"], jd["experience"]) / jd["experience"] * 100
+    else:
+        experience_match = 100.0
+
+    # Education Match
+    if jd["education"] is None:
+        education_match = 100.0
+    else:
+        education_match = min(cv["education"], jd["education"]) / jd["education"] * 100
+
+    # Industry & Role Relevance
+    if jd["industries"]:
+        industry_match = len(cv["industries"] & jd["industries"]) / len(jd["industries"]) * 100
+    else:
+        industry_match = 100.0
+
+    score = (skill_match + experience_match + education_match + industry_match) / 4
+    return round(max(0.0, min(100.0, score)), 2)
@@ -1,11 +1,23 @@
 import os
+import io
+import hashlib
+import posixpath
 import tempfile
 import shutil
-from fastapi import FastAPI, File, UploadFile
-from typing import List
+import re
+import uuid
+import zipfile
+from fastapi import FastAPI, File, UploadFile, Request, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 from pathlib import Path
-from rank_cv import process_and_rank_cvs
+from rank_cv import process_and_rank_cvs, process_and_rank_cvs_multi
 from score_jd import score_jds 
+from deadline import Deadline
+from executors import PoolSaturated, admit_request
+from singleflight import AsyncSingleFlight
+from profiling import PROFILE_REQUESTS, bind_to_request, profile_request, list_profiles, resolve_profile
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -17,46 +29,211 @@ app.add_middleware(
     allow_methods=["*"],  
     allow_headers=["*"],  
 )
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    """Shed load with a 503 instead of queuing without bound."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+# Largest CV accepted, uploaded directly or inside a ZIP archive
+MAX_CV_FILE_BYTES = int(os.getenv("MAX_CV_FILE_BYTES", str(20 * 1024 * 1024)))
+
+# Identical requests in flight at the same time share one pipeline run
+request_flight = AsyncSingleFlight()
+
+def upload_hash(upload: UploadFile) -> str:
+    """SHA-256 of an upload, read in chunks from the spooled file."""
+    digest = hashlib.sha256()
+    upload.file.seek(0)
+    for chunk in iter(lambda: upload.file.read(1 << 20), b""):
+        digest.update(chunk)
+    upload.file.seek(0)
+    return digest.hexdigest()
+
+async def request_key(endpoint: str, jds: List[UploadFile], cvs: List[UploadFile], deadline: Optional[float]):
+    """Coalescing key: the endpoint, the JD contents, the CV set and the time budget."""
+    def hashes():
+        jd_hashes = tuple(upload_hash(jd) for jd in jds)
+        cv_hashes = tuple(sorted((cv.filename, upload_hash(cv)) for cv in cvs))
+        return jd_hashes, cv_hashes
+    return (endpoint, *await run_in_threadpool(hashes), deadline)
+
+def detach_uploads(uploads: List[UploadFile]) -> List[UploadFile]:
+    """Take over the uploads' spooled files so they outlive the request that sent them."""
+    detached = []
+    for upload in uploads:
+        detached.append(UploadFile(upload.file, size=upload.size, filename=upload.filename, headers=upload.headers))
+        # Starlette closes this placeholder when the request ends
+        upload.file = io.BytesIO()
+    return detached
+
+async def coalesced(key, run, deadline: Optional[float], jds: List[UploadFile], cvs: List[UploadFile]):
+    """Run ``run(request_deadline, jds, cvs)`` once per key and share (result, skipped stages).
+
+    The run keeps going if the request that started it goes away, so it
+    works on detached copies of that request's uploads. Only the starting
+    request takes a pipeline slot; requests joining a run in flight are
+    never rejected.
+    """
+    def leader():
+        # Detached now, before the starting request can be cancelled
+        return shared_run(detach_uploads(jds), detach_uploads(cvs))
+
+    async def shared_run(own_jds, own_cvs):
+        try:
+            # Admission reserves a pipeline slot; the pipeline itself never sheds load midway
+            with admit_request():
+                request_deadline = Deadline(deadline)
+                result = await run(request_deadline, own_jds, own_cvs)
+                return result, request_deadline.skipped
+        finally:
+            for upload in own_jds + own_cvs:
+                upload.file.close()
+
+    return await request_flight.do(key, leader)
+
+@app.middleware("http")
+async def profile_middleware(request: Request, call_next):
+    """Profile the request when PROFILE_REQUESTS is set or an X-Profile header is sent.
+
+    The saved profile is named after X-Request-ID, or a generated id that is
+    returned in the X-Profile-Id response header.
+    """
+    requested = request.headers.get("x-profile")
+    if not requested and not PROFILE_REQUESTS:
+        return await call_next(request)
+    if request.url.path.startswith("/profiles"):
+        return await call_next(request)
+
+    request_id = request.headers.get("x-request-id", "")
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", request_id):
+        request_id = uuid.uuid4().hex
+
+    with profile_request(request_id):
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = request_id
+    return response
+
+
+def unique_name(name: str, seen: set) -> str:
+    """Return ``name``, or ``name (2)``, ``name (3)``... if it was already used."""
+    candidate, stem, ext, n = name, *os.path.splitext(name), 1
+    while candidate in seen:
+        n += 1
+        candidate = f"{stem} ({n}){ext}"
+    seen.add(candidate)
+    return candidate
+
+def too_large(name: str, size: Optional[int]):
+    return HTTPException(status_code=413, detail=f"{name} is {size} bytes, above MAX_CV_FILE_BYTES ({MAX_CV_FILE_BYTES})")
+
+def iter_upload_contents(uploads: List[UploadFile]):
+    """Lazily yield (filename, content) for each uploaded CV.
+
+    Uploads are spooled to disk by Starlette, so each file is only read into
+    memory when the pipeline asks for it. ZIP archives are expanded member
+    by member and every PDF, DOCX or TXT inside is yielded as its own CV,
+    named by its path in the archive. Names are made unique across the
+    request, and any CV above MAX_CV_FILE_BYTES fails the request with a 413.
+    """
+    seen = set()
+    for upload in uploads:
+        upload.file.seek(0)
+        if upload.filename.lower().endswith(".zip") and zipfile.is_zipfile(upload.file):
+            upload.file.seek(0)
+            with zipfile.ZipFile(upload.file) as archive:
+                members = [
+                    member for member in archive.infolist()
+                    if not member.is_dir() and member.filename.lower().endswith((".pdf", ".docx", ".txt"))
+                ]
+                # Checked up front; zipfile never inflates a member past its declared size
+                for member in members:
+                    if member.file_size > MAX_CV_FILE_BYTES:
+                        raise too_large(member.filename, member.file_size)
+                for member in members:
+                    yield unique_name(posixpath.normpath(member.filename).lstrip("/"), seen), archive.read(member)
+        else:
+            if upload.size is not None and upload.size > MAX_CV_FILE_BYTES:
+                raise too_large(upload.filename, upload.size)
+            upload.file.seek(0)
+            yield unique_name(upload.filename, seen), upload.file.read()
+
 @app.post("/jd-cvs")
-async def upload_files(jd: UploadFile = File(...), cvs: List[UploadFile] = File(...)):
-    """Upload multiple CVs and one Job Description (JD), then process them in real time."""
-    
-    # Read JD content from memory
-    jd_content = await jd.read()
-    
-    # Read CVs content from memory
-    cv_contents = [(cv.filename, await cv.read()) for cv in cvs]
+async def upload_files(jd: UploadFile = File(...), cvs: List[UploadFile] = File(...), deadline: Optional[float] = None):
+    """Upload multiple CVs (or a ZIP of CVs) and one Job Description (JD), then process them in real time.
+
+    ``deadline`` is an optional time budget in seconds; LLM stages that would
+    exceed it are skipped and listed in ``skipped_stages``.
+    """
+    async def run(request_deadline, jds, cvs):
+        # Read JD content from memory
+        jd_content = await jds[0].read()
+
+        # CVs are streamed into the pipeline one window at a time
+        # The pipeline blocks, so it runs off the event loop; its stages use the CPU and LLM pools
+        return await run_in_threadpool(bind_to_request(process_and_rank_cvs), iter_upload_contents(cvs), jd_content, request_deadline)
 
-    # Call the processing function with in-memory files
-    result = process_and_rank_cvs(cv_contents, jd_content)
+    key = await request_key("jd-cvs", [jd], cvs, deadline)
+    result, skipped = await coalesced(key, run, deadline, [jd], cvs)
+    return {"message": "Processing complete", "result": result, "skipped_stages": skipped}
 
-    return {"message": "Processing complete", "result": result}
+@app.post("/jds-cvs")
+async def rank_matrix_endpoint(jds: List[UploadFile] = File(...), cvs: List[UploadFile] = File(...), deadline: Optional[float] = None):
+    """Upload multiple JDs and multiple CVs, then return a CV ranking per JD."""
+    async def run(request_deadline, jds, cvs):
+        # Rankings are keyed by JD name, so two uploads named job.pdf must not collapse
+        seen = set()
+        jd_contents = [(unique_name(jd.filename, seen), await jd.read()) for jd in jds]
+
+        # Each document is extracted and embedded once for all JDs
+        return await run_in_threadpool(bind_to_request(process_and_rank_cvs_multi), iter_upload_contents(cvs), jd_contents, request_deadline)
+
+    # JD filenames label the results, so they are part of the key
+    key = await request_key("jds-cvs", jds, cvs, deadline) + (tuple(jd.filename for jd in jds),)
+    result, skipped = await coalesced(key, run, deadline, jds, cvs)
+    return {"message": "Processing complete", "result": result, "skipped_stages": skipped}
 
 @app.post("/score-jds")
-async def score_jds_endpoint(jds: List[UploadFile] = File(...), cv: UploadFile = File(...)):
+async def score_jds_endpoint(jds: List[UploadFile] = File(...), cv: UploadFile = File(...), deadline: Optional[float] = None):
     """Upload multiple JDs and one CV, then return matching scores."""
-    
-    # Create temporary directory
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Save uploaded JD files temporarily
-        jd_paths = []
-        for jd in jds:
-            jd_path = os.path.join(temp_dir, jd.filename)
-            jd_paths.append(jd_path)
-            with open(jd_path, "wb") as f:
-                f.write(await jd.read())
-
-        # Save CV file temporarily
-        cv_path = os.path.join(temp_dir, cv.filename)
-        with open(cv_path, "wb") as f:
-            f.write(await cv.read())
-
-        # Call the score_jds function
-        results = score_jds(jd_paths, cv_path)
-
-        # Files are automatically cleaned up when exiting the context manager
-
-    return {"message": "Scoring complete", "results": results}
+    async def run(request_deadline, jds, cvs):
+        cv = cvs[0]
+        # Create temporary directory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Save uploaded JD files temporarily, under names unique within the request
+            seen = set()
+            jd_paths = []
+            for jd in jds:
+                jd_path = os.path.join(temp_dir, unique_name(jd.filename, seen))
+                jd_paths.append(jd_path)
+                with open(jd_path, "wb") as f:
+                    f.write(await jd.read())
+
+            # Save CV file temporarily
+            cv_path = os.path.join(temp_dir, unique_name(cv.filename, seen))
+            with open(cv_path, "wb") as f:
+                f.write(await cv.read())
+
+            # Call the score_jds function
+            # Files are automatically cleaned up when exiting the context manager
+            return await run_in_threadpool(bind_to_request(score_jds), jd_paths, cv_path, request_deadline)
+
+    key = await request_key("score-jds", jds, [cv], deadline) + (tuple(jd.filename for jd in jds),)
+    results, skipped = await coalesced(key, run, deadline, jds, [cv])
+    return {"message": "Scoring complete", "results": results, "skipped_stages": skipped}
+@app.get("/profiles")
+async def list_profiles_endpoint():
+    """List the captured request profiles."""
+    return {"profiles": list_profiles()}
+
+@app.get("/profiles/{name}")
+async def download_profile(name: str):
+    """Download one captured profile (.collapsed)."""
+    path = resolve_profile(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
 if __name__ == "__main__":
     import uvicorn
 
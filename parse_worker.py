@@ -0,0 +1,16 @@
+"""CV reading run on the parse process pool.
+
+Text extraction, MinHash and the rule-based parser are pure Python and hold
+the GIL, so they run in spawned worker processes. Imports stay light so the
+workers start without loading the embedding model or the LLM client.
+"""
+from typing import Optional, Tuple
+import numpy as np
+from dedup import minhash_signature
+from text_extraction import extract_text
+
+
+def read_cv(content: bytes) -> Tuple[str, Optional[np.ndarray]]:
+    """Extract the text of a CV and its MinHash signature."""
+    text = extract_text(content)
+    return text, minhash_signature(text)
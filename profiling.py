@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Optional
+
+# Profiling is opt-in per request (X-Profile header) or for every request
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_SUFFIX = ".collapsed"
+
+
+class StackSampler:
+    """Samples the stacks of the threads working for one request as collapsed stacks.
+
+    Worker threads count as the request's while they run a task bound with
+    ``bind_to_request``, so other requests and idle pool workers are left out.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.threads = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def enter(self):
+        with self._lock:
+            self.threads[threading.get_ident()] += 1
+
+    def exit(self):
+        with self._lock:
+            thread_id = threading.get_ident()
+            self.threads[thread_id] -= 1
+            if not self.threads[thread_id]:
+                del self.threads[thread_id]
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                thread_ids = set(self.threads)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# Sampler of the request being handled in the current context
+_current_sampler: contextvars.ContextVar[Optional[StackSampler]] = contextvars.ContextVar("current_sampler", default=None)
+
+
+def bind_to_request(fn: Callable) -> Callable:
+    """Bind ``fn`` to the calling request so a worker thread running it is profiled with it.
+
+    Call once per task: the returned callable carries a copy of the caller's context.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(_run_sampled, fn, args, kwargs)
+    return run
+
+
+def _run_sampled(fn: Callable, args, kwargs):
+    sampler = _current_sampler.get()
+    if sampler is None:
+        return fn(*args, **kwargs)
+    sampler.enter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        sampler.exit()
+
+
+def profile_path(request_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{request_id}{PROFILE_SUFFIX}")
+
+
+@contextmanager
+def profile_request(request_id: str):
+    """Sample the threads working for the enclosed request and save <request_id>.collapsed under PROFILE_DIR."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    sampler = StackSampler()
+    token = _current_sampler.set(sampler)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        _current_sampler.reset(token)
+        sampler.dump(profile_path(request_id))
+
+
+def list_profiles() -> List[Dict]:
+    """List the captured profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        stat = os.stat(os.path.join(PROFILE_DIR, name))
+        profiles.append({"name": name, "size": stat.st_size, "created": stat.st_mtime})
+    return sorted(profiles, key=lambda p: p["created"], reverse=True)
+
+
+def resolve_profile(name: str):
+    """Return the path of a captured profile, or None if it does not exist."""
+    if name != os.path.basename(name) or not name.endswith(PROFILE_SUFFIX):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -1,6 +1,5 @@
 import os
 import json
-import PyPDF2
 from dotenv import load_dotenv
 import litellm
 from litellm import completion
@@ -8,9 +7,20 @@ import re
 import io
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List, Tuple
+from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import timeit
 import time
+from deadline import Deadline, record_stage_duration
+from cv_parser import parse_cv, CV_PARSER_CONFIDENCE
+from dedup import LSHIndex
+from corpus import open_corpus, text_hash
+from executors import cpu_executor, llm_executor, parse_executor, LLM_POOL_SIZE
+from text_extraction import extract_text
+from parse_worker import read_cv
+from singleflight import SingleFlight
+from rerank import tournament_rerank, llm_order
+from profiling import bind_to_request
 
 # Load environment variables
 load_dotenv()
@@ -20,27 +30,32 @@ if not GEMINI_API_KEY:
 
 litellm.enable_json_schema_validation=True
 
+# Maximum number of CVs held in memory and processed at the same time
+CV_PIPELINE_WINDOW = int(os.getenv("CV_PIPELINE_WINDOW", "4"))
+
+# LLM rerank: how many embedding-ranked CVs to rerank and CVs per LLM call.
+# Depths up to RERANK_WINDOW squared take two sequential rounds.
+RERANK_DEPTH = int(os.getenv("RERANK_DEPTH", "20"))
+RERANK_WINDOW = int(os.getenv("RERANK_WINDOW", "10"))
+
 # Load SentenceTransformer Model for Embeddings
 embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Persistent store of processed CVs used for cross-request deduplication
+cv_corpus = open_corpus()
+
+# Coalesces concurrent structuring of the same CV text across requests
+document_flight = SingleFlight()
+
 
 def extract_text_from_pdf(pdf_input):
-    """Extract text from a PDF file or a BytesIO object."""
-    if isinstance(pdf_input, (str, os.PathLike)):  # If given a file path
-        with open(pdf_input, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    elif isinstance(pdf_input, io.BytesIO):  # If given a BytesIO object
-        pdf_input.seek(0)  # Ensure the pointer is at the start
-        reader = PyPDF2.PdfReader(pdf_input)
-        text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    else:
+    """Extract text from a PDF (or DOCX/TXT) file path or BytesIO object."""
+    if not isinstance(pdf_input, (str, os.PathLike, io.BytesIO)):
         raise TypeError("Invalid pdf_input type. Expected file path or BytesIO object.")
-
-    return text.strip()
+    return parse_executor.run(extract_text, pdf_input)
 
 
-def generate_json_from_text(text):
+def generate_json_from_text(text, timeout: Optional[float] = None):
     """Use LLM to convert extracted text into structured JSON."""
     prompt = f"""
     
@@ -56,7 +71,8 @@ def generate_json_from_text(text):
         model="gemini/gemini-2.0-flash",
         messages=[{"role": "user", "content": prompt}],
         api_key=os.getenv("GOOGLE_API_KEY"),
-        response_format={'type': 'json_object'}
+        response_format={'type': 'json_object'},
+        timeout=timeout
         
     )
     # response = model.generate_content(prompt, generation_config=genai.types.GenerationConfig(temperature=0))
@@ -102,28 +118,47 @@ def match_jd_with_cvs(jd_text: str, cv_store: List[Tuple[str, dict, List[float]]
     # print(scores)
     return scores
 
-def sort_top_cvs_with_llm(ranked_cvs: List[Tuple[str, float]], jd_text: str, cv_store: List[Tuple[str, dict, List[float]]]) -> dict:
-    """Use LLM to sort the top CVs based on final ranking and provide insights."""
-    
-    # Get top 5 CVs
-    top_cvs = ranked_cvs[:5]
-    cv_data = []
-
-    for cv_name, _ in top_cvs:
-        for filename, json_data in cv_store.items():
-            if filename == cv_name:
-                cv_data.append({
-                    "filename": filename,
-                    "json_data": json_data
-                })
-                break
-
-    if not cv_data:
-        return {"ranked_cvs": []}
+def sort_top_cvs_with_llm(ranked_cvs: List[Tuple[str, float]], jd_text: str, cv_store: dict, timeout: Optional[float] = None, depth: int = RERANK_DEPTH) -> dict:
+    """Use LLM to sort the top ``depth`` CVs based on final ranking.
+
+    Depths larger than one window are reranked as a tournament: the windows
+    are ranked concurrently and their best CVs meet in a final window, so
+    any depth up to RERANK_WINDOW squared costs two sequential LLM calls.
+    ``timeout`` bounds the whole rerank.
+    """
+    names = [name for name, _ in ranked_cvs[:depth] if name in cv_store]
+    if not names:
+        return {"ranked_cvs": []}, 0, 0
+
+    end_time = None if timeout is None else time.monotonic() + timeout
+    tokens = {"input": 0, "output": 0}
+
+    def rank_windows(groups):
+        remaining = None if end_time is None else end_time - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError("LLM rerank ran out of time between tournament rounds")
+        futures = [
+            llm_executor.submit(rerank_window, [{"filename": name, "json_data": cv_store[name]} for name in group], jd_text, remaining)
+            for group in groups
+        ]
+        orders = []
+        for future in futures:
+            ranking, input_tokens, output_tokens = future.result()
+            tokens["input"] += input_tokens
+            tokens["output"] += output_tokens
+            orders.append(llm_order(ranking))
+        return orders
+
+    merged = tournament_rerank(names, rank_windows, RERANK_WINDOW)
+    return {"ranked_cvs": [{"filename": name, "ranking": str(i + 1)} for i, name in enumerate(merged)]}, tokens["input"], tokens["output"]
+
+
+def rerank_window(cv_data: List[dict], jd_text: str, timeout: Optional[float] = None):
+    """Ask the LLM for a listwise ranking of one window of CVs."""
 
     # Prepare prompt for LLM
     prompt = f"""
-    You are a hiring assistant. Below is a job description and the JSON data of the top 5 CVs.
+    You are a hiring assistant. Below is a job description and the JSON data of the top {len(cv_data)} CVs.
     Your task is to analyze the CVs and rank them in order of best fit for the job description.
     Only give ranking as per given format, do not give any additional information.
 
@@ -153,7 +188,8 @@ def sort_top_cvs_with_llm(ranked_cvs: List[Tuple[str, float]], jd_text: str, cv_
         model="gemini/gemini-2.0-flash",
         messages=[{"role": "user", "content": prompt}],
         api_key=os.getenv("GOOGLE_API_KEY"),
-        response_format={'type': 'json_object'}
+        response_format={'type': 'json_object'},
+        timeout=timeout
     )
     # # Call Gemini LLM
     # response = model.generate_content(prompt, generation_config=genai.types.GenerationConfig(temperature=0))
@@ -168,45 +204,270 @@ def sort_top_cvs_with_llm(ranked_cvs: List[Tuple[str, float]], jd_text: str, cv_
         raise ValueError("Failed to parse LLM response as JSON.")
 
 
-def process_and_rank_cvs(cv_contents: list, jd_content: bytes):
-    """Complete pipeline: Process CVs, match with JD, and rank using LLM."""
-    
-    # Process all CVs (extract text from in-memory files)
+def process_cv(filename: str, content: bytes, deadline: Optional[Deadline] = None, batch_index: Optional[LSHIndex] = None,
+               order: Optional[int] = None):
+    """Extract, parse and embed a single CV.
+
+    Near-duplicates of a CV already seen in this batch are not processed
+    again (``duplicate_of`` names the representative); ``order`` is the
+    upload position, which lets an earlier upload take over as
+    representative. Concurrent requests
+    structuring the same CV text share one extraction. Requests with and
+    without a deadline never share one, and a request that joins an
+    extraction it cannot wait for falls back to the local parse.
+    """
+    deadline = deadline or Deadline()
+    text, signature = parse_executor.run(read_cv, content)
+    result = {"filename": filename, "input_tokens": 0, "output_tokens": 0, "duplicate_of": None}
+
+    if batch_index is not None:
+        result["duplicate_of"] = batch_index.query_or_add(filename, signature, order)
+        if result["duplicate_of"] is not None:
+            return result
+
+    key = text_hash(text)
+    bounded = deadline.remaining() is not None
+    try:
+        structured = document_flight.do((key, bounded), structure_cv, filename, text, key, signature, deadline,
+                                        wait_timeout=deadline.remaining())
+    except TimeoutError:
+        if not bounded:
+            raise
+        print(f"Shared extraction for {filename} outlasted the deadline, using the local parse")
+        cv_json, _ = parse_executor.run(parse_cv, text)
+        structured = {"cv_json": cv_json, "embedding": cpu_executor.run(generate_embedding, json.dumps(cv_json)),
+                      "input_tokens": 0, "output_tokens": 0, "skipped": ["llm_extraction"]}
+    for stage in structured["skipped"]:
+        deadline.skip(stage)
+    result.update({name: structured[name] for name in ("cv_json", "embedding", "input_tokens", "output_tokens")})
+    return result
+
+
+def structure_cv(filename: str, text: str, key: str, signature, deadline: Deadline) -> dict:
+    """Turn CV text into JSON and an embedding.
+
+    CVs already in the persistent corpus reuse their stored JSON and
+    embedding. The local rule-based parser is tried first and only
+    low-confidence CVs are sent to the LLM. If the deadline cannot fit an
+    LLM extraction the local parse is used as is, so every CV in a ranking
+    is embedded from its JSON. Skipped stages are returned rather than recorded, so
+    every request sharing this call can record them on its own deadline.
+    """
+    result = {"input_tokens": 0, "output_tokens": 0, "skipped": []}
+    # CVs with (almost) no text are never shared through the corpus
+    use_corpus = cv_corpus is not None and signature is not None
+    if use_corpus:
+        stored_key = cv_corpus.find_duplicate(key, signature)
+        if stored_key is not None:
+            result["cv_json"], result["embedding"] = cv_corpus.get(stored_key)
+            return result
+
+    cv_json, confidence = parse_executor.run(parse_cv, text)
+    if confidence < CV_PARSER_CONFIDENCE:
+        if not deadline.allows("llm_extraction"):
+            result["skipped"].append("llm_extraction")
+            result["cv_json"], result["embedding"] = cv_json, cpu_executor.run(generate_embedding, json.dumps(cv_json))
+            return result
+        try:
+            start = time.monotonic()
+            cv_json, result["input_tokens"], result["output_tokens"] = llm_executor.run(generate_json_from_text, text, timeout=deadline.remaining())
+            record_stage_duration("llm_extraction", time.monotonic() - start)
+        except Exception as e:
+            if deadline.remaining() is None:
+                raise
+            print(f"LLM extraction for {filename} failed within deadline: {e}")
+            result["skipped"].append("llm_extraction")
+            result["cv_json"], result["embedding"] = cv_json, cpu_executor.run(generate_embedding, json.dumps(cv_json))
+            return result
+
+    result["cv_json"] = cv_json
+    result["embedding"] = cpu_executor.run(generate_embedding, json.dumps(cv_json))
+    if use_corpus:
+        cv_corpus.add(key, filename, signature, cv_json, result["embedding"])
+    return result
+
+
+def rerank_within_deadline(ranked_cvs: List[Tuple[str, float]], jd_text: str, cv_json_store: dict, deadline: Optional[Deadline] = None):
+    """Run the LLM rerank, or fall back to the embedding order if it would miss the deadline."""
+    deadline = deadline or Deadline()
+    if deadline.allows("llm_rerank"):
+        try:
+            start = time.monotonic()
+            result = sort_top_cvs_with_llm(ranked_cvs, jd_text, cv_json_store, timeout=deadline.remaining())
+            record_stage_duration("llm_rerank", time.monotonic() - start)
+            return result
+        except Exception as e:
+            if deadline.remaining() is None:
+                raise
+            print(f"LLM rerank failed within deadline: {e}")
+
+    deadline.skip("llm_rerank")
+    # Best-effort ranking straight from the embedding scores
+    best_effort = {"ranked_cvs": [{"filename": name, "ranking": str(i + 1)} for i, (name, _) in enumerate(ranked_cvs[:RERANK_DEPTH])]}
+    return best_effort, 0, 0
+
+
+def process_cvs_streaming(cv_contents, window: int = CV_PIPELINE_WINDOW, deadline: Optional[Deadline] = None):
+    """Process an iterable of (filename, content) pairs through a bounded pipeline.
+
+    The next CV is only pulled from ``cv_contents`` once a slot in the
+    window is free, so at most ``window`` raw documents are held in memory
+    regardless of how many CVs are uploaded. Near-duplicate CVs are
+    collapsed onto the earliest upload among them, however their reads
+    interleave. Returns the JSON store, the embedding store, the token
+    counts and a map of representative -> duplicate filenames.
+    """
+    cv_json_store = {}
     cv_store = {}
+    tokens = {"input": 0, "output": 0}
+    duplicates = {}
+    upload_order = {}
+    batch_index = LSHIndex()
+
+    def collect(done):
+        for future in done:
+            result = future.result()
+            if result["duplicate_of"] is not None:
+                duplicates.setdefault(result["duplicate_of"], []).append(result["filename"])
+                continue
+            cv_json_store[result["filename"]] = result["cv_json"]
+            cv_store[result["filename"]] = result["embedding"]
+            tokens["input"] += result["input_tokens"]
+            tokens["output"] += result["output_tokens"]
+
+    window = max(1, window)
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending = set()
+        for order, (filename, content) in enumerate(cv_contents):
+            upload_order[filename] = order
+            # Backpressure: wait for a free slot before reading the next upload
+            while len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(bind_to_request(process_cv), filename, content, deadline, batch_index, order))
+        collect(wait(pending).done)
+
+    # A later upload indexed before an earlier near-duplicate of it was
+    # processed anyway; fold it under the earlier upload
+    for later in batch_index.superseded:
+        cv_json_store.pop(later, None)
+        cv_store.pop(later, None)
+        duplicates.setdefault(later, []).insert(0, later)
+    grouped = {}
+    for representative, names in duplicates.items():
+        grouped.setdefault(batch_index.representative(representative), []).extend(names)
+    duplicates = {representative: sorted(names, key=upload_order.get) for representative, names in grouped.items()}
+
+    return cv_json_store, cv_store, tokens, duplicates
+
+
+def process_and_rank_cvs(cv_contents, jd_content: bytes, deadline: Optional[Deadline] = None):
+    """Complete pipeline: Process CVs, match with JD, and rank using LLM.
+
+    ``cv_contents`` may be a list or any lazy iterable of (filename, content) pairs.
+    Stages skipped to meet ``deadline`` are recorded in ``deadline.skipped``.
+    """
+    
+    # Process all CVs through the bounded pipeline
     start_time = timeit.default_timer()
-    for filename, content in cv_contents:
-        text = extract_text_from_pdf(io.BytesIO(content))
-        cv_json, input_tokens, output_tokens = generate_json_from_text(text)
-        cv_store[filename] = embedding_model.encode(json.dumps(cv_json)).tolist()
+    cv_json_store, cv_store, tokens, duplicates = process_cvs_streaming(cv_contents, deadline=deadline)
 
     # Process JD (extract text from in-memory JD file)
     jd_text = extract_text_from_pdf(io.BytesIO(jd_content))  # Pass BytesIO object
 
     # Match JD with CVs using semantic similarity
-    ranked_cvs = match_jd_with_cvs(jd_text, cv_store)
+    ranked_cvs = cpu_executor.run(match_jd_with_cvs, jd_text, cv_store)
 
     if not ranked_cvs:
         print("No matching CVs found.")
         return {"message": "No matching CVs found"}
 
-    # Use LLM to rank top 5 CVs
-    final_ranking, input_tokens2, output_tokens2 = sort_top_cvs_with_llm(ranked_cvs, jd_text, cv_store)
+    # Use LLM to rank the top RERANK_DEPTH CVs
+    final_ranking, input_tokens2, output_tokens2 = rerank_within_deadline(ranked_cvs, jd_text, cv_json_store, deadline)
     end_time = timeit.default_timer()
     print("Time taken:", end_time - start_time)
     
-    # Create a dictionary to store match scores with CV names from initial ranking
-    cv_score_dict = {cv[0]: round(cv[1] * 100, 2) for cv in ranked_cvs}
-    print("Total input tokens for json", input_tokens)
-    print("Total output tokens for json", output_tokens)
+    print("Total input tokens for json", tokens["input"])
+    print("Total output tokens for json", tokens["output"])
     print("Total input tokens for llm", input_tokens2)
     print("Total output tokens for llm", output_tokens2)
-    llm_results = [
-        {
+
+    return build_ranking_results(final_ranking, ranked_cvs, duplicates)
+
+
+def build_ranking_results(final_ranking: dict, ranked_cvs: List[Tuple[str, float]], duplicates: Optional[dict] = None) -> list:
+    """Combine the LLM ordering with the embedding match scores.
+
+    Near-duplicate filenames share their representative's score and are
+    listed under its ``duplicates`` key.
+    """
+    duplicates = duplicates or {}
+    # Create a dictionary to store match scores with CV names from initial ranking
+    cv_score_dict = {cv[0]: round(cv[1] * 100, 2) for cv in ranked_cvs}
+    results = []
+    for i, cv in enumerate(final_ranking["ranked_cvs"]):
+        result = {
             "id": str(i + 1),  #  Ensure each result has an ID
             "name": cv["filename"],
             "matchScore": cv_score_dict.get(cv["filename"], 0)  # Convert similarity to percentage
         }
-        for i, cv in enumerate(final_ranking["ranked_cvs"])
-    ]
+        if cv["filename"] in duplicates:
+            result["duplicates"] = duplicates[cv["filename"]]
+        results.append(result)
+    return results
+
+
+def similarity_matrix(jd_embeddings: np.ndarray, cv_embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every JD against every CV as a (n_jds, n_cvs) matrix."""
+    jd_embeddings = np.asarray(jd_embeddings, dtype=np.float32)
+    cv_embeddings = np.asarray(cv_embeddings, dtype=np.float32)
+    jd_norms = np.linalg.norm(jd_embeddings, axis=1, keepdims=True)
+    cv_norms = np.linalg.norm(cv_embeddings, axis=1, keepdims=True)
+    jd_norms[jd_norms == 0] = 1.0
+    cv_norms[cv_norms == 0] = 1.0
+    return (jd_embeddings / jd_norms) @ (cv_embeddings / cv_norms).T
+
+
+def process_and_rank_cvs_multi(cv_contents, jd_contents: list, deadline: Optional[Deadline] = None) -> dict:
+    """Rank one pool of CVs against several JDs.
+
+    Every CV and JD is extracted and embedded exactly once, the JD x CV
+    similarity matrix is computed in a single step and the per-JD LLM
+    reranks run concurrently. Returns a ranking per JD filename.
+    """
+    start_time = timeit.default_timer()
+
+    # Extract and embed each CV once, keeping its JSON for the LLM rerank
+    cv_json_store, cv_store, _, duplicates = process_cvs_streaming(cv_contents, deadline=deadline)
+
+    if not cv_json_store:
+        return {"message": "No matching CVs found"}
+
+    jd_futures = {filename: parse_executor.submit(extract_text, content) for filename, content in jd_contents}
+    jd_texts = {filename: future.result() for filename, future in jd_futures.items()}
+
+    # Embed the JDs in one batch and score the full matrix at once
+    cv_names = list(cv_store)
+    cv_embeddings = np.array([cv_store[name] for name in cv_names])
+    jd_names = list(jd_texts)
+    jd_embeddings = cpu_executor.run(embedding_model.encode, [jd_texts[name] for name in jd_names])
+    scores = similarity_matrix(jd_embeddings, cv_embeddings)
+
+    ranked_per_jd = {}
+    for row, jd_name in enumerate(jd_names):
+        ranked = [(cv_names[col], float(scores[row, col])) for col in np.argsort(-scores[row])]
+        ranked_per_jd[jd_name] = ranked
+
+    # Rerank the shortlists concurrently; the LLM pool bounds the calls in flight
+    with ThreadPoolExecutor(max_workers=max(1, min(len(jd_names), LLM_POOL_SIZE))) as executor:
+        futures = {
+            jd_name: executor.submit(bind_to_request(rerank_within_deadline), ranked_per_jd[jd_name], jd_texts[jd_name], cv_json_store, deadline)
+            for jd_name in jd_names
+        }
+        results = {}
+        for jd_name, future in futures.items():
+            final_ranking, _, _ = future.result()
+            results[jd_name] = build_ranking_results(final_ranking, ranked_per_jd[jd_name], duplicates)
 
-    return llm_results
+    print("Time taken:", timeit.default_timer() - start_time)
+    return results
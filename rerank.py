@@ -0,0 +1,100 @@
+"""Tournament merge of listwise LLM reranks over a deep shortlist.
+
+The shortlist is split into windows that are ranked concurrently, and the
+best CVs of every window go on to a final window, so a CV the LLM prefers
+can rise from the bottom of the shortlist to the top. Each window sends as
+many CVs as fit into one final window, which keeps any depth up to
+window * window at two sequential rounds.
+"""
+import math
+from typing import Callable, List, Tuple
+
+
+def rerank_windows(count: int, window: int) -> List[Tuple[int, int]]:
+    """Consecutive (start, end) windows of at most ``window`` CVs covering ``count`` CVs.
+
+    Windows are balanced in size, so no CV gets through a near-empty window.
+    """
+    window = max(2, window)
+    windows = math.ceil(count / window)
+    if not windows:
+        return []
+    size, extra = divmod(count, windows)
+    bounds, start = [], 0
+    for i in range(windows):
+        end = start + size + (i < extra)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def advancing(window: int, windows: int) -> int:
+    """CVs each window sends on so that all winners fit in one window (at least one)."""
+    return max(1, min(window - 1, window // windows))
+
+
+def llm_order(ranking) -> List[str]:
+    """Filenames of an LLM ranking response in ranked order.
+
+    Malformed entries are dropped and entries with a non-numeric ranking
+    keep their response order after the numbered ones.
+    """
+    entries = ranking.get("ranked_cvs") if isinstance(ranking, dict) else None
+    if not isinstance(entries, list):
+        return []
+    entries = [entry for entry in entries if isinstance(entry, dict) and isinstance(entry.get("filename"), str)]
+
+    def position(item):
+        index, entry = item
+        try:
+            return float(entry.get("ranking")), index
+        except (TypeError, ValueError):
+            return math.inf, index
+    return [entry["filename"] for _, entry in sorted(enumerate(entries), key=position)]
+
+
+def window_order(members: List[str], order: List[str]) -> List[str]:
+    """Clean one window's LLM order: unknown and repeated names are dropped and
+    members the LLM left out follow in their embedding order."""
+    member_set = set(members)
+    ordered = [name for name in dict.fromkeys(order) if name in member_set]
+    returned = set(ordered)
+    return ordered + [name for name in members if name not in returned]
+
+
+def tournament_rerank(names: List[str], rank_windows: Callable[[List[List[str]]], List[List[str]]],
+                      window: int) -> List[str]:
+    """Merge listwise reranks of ``names`` (in embedding order) into one global order.
+
+    ``rank_windows`` receives every window of a round and returns the LLM
+    order of each, so the caller decides how to run them concurrently. The
+    final window's order comes first. CVs knocked out earlier follow: later
+    rounds rank above earlier ones, then place within their window, then
+    embedding order.
+    """
+    window = max(2, window)
+    position = {name: i for i, name in enumerate(names)}
+    candidates = list(names)
+    eliminated = []
+    tournament_round = 0
+
+    while True:
+        groups = [candidates[start:end] for start, end in rerank_windows(len(candidates), window)]
+        # A lone CV needs no LLM call
+        contested = [group for group in groups if len(group) > 1]
+        orders = dict(zip(map(tuple, contested), rank_windows(contested))) if contested else {}
+        ranked = [window_order(group, orders.get(tuple(group), [])) for group in groups]
+        if len(ranked) <= 1:
+            final = ranked[0] if ranked else []
+            break
+
+        advance = advancing(window, len(ranked))
+        winners = []
+        for order in ranked:
+            winners += order[:advance]
+            eliminated += [(tournament_round, slot, position[name], name) for slot, name in enumerate(order[advance:])]
+        candidates = sorted(winners, key=position.get)
+        tournament_round += 1
+
+    eliminated.sort(key=lambda entry: (-entry[0], entry[1], entry[2]))
+    return final + [entry[3] for entry in eliminated]
@@ -3,10 +3,16 @@ import json
 import litellm
 from litellm import completion
 from dotenv import load_dotenv
-import PyPDF2
 import timeit
 import time
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+from rank_cv import generate_json_from_text, generate_embedding
+from deadline import Deadline, record_stage_duration
+from executors import cpu_executor, llm_executor, parse_executor
+from text_extraction import extract_text
+from local_scoring import cv_profile as build_cv_profile, jd_profile, score_locally
+from cv_parser import parse_cv, CV_PARSER_CONFIDENCE
 
 # Load environment variables
 load_dotenv()
@@ -57,63 +63,125 @@ Follow this step-by-step method to compute the score:
 
 """
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extracts and normalizes PDF text"""
-    text = ""
+def extract_text_from_pdf(file_path: str, normalize: bool = True) -> str:
+    """Extracts and normalizes PDF (or DOCX/TXT) text"""
     try:
-        with open(file_path, "rb") as pdf_file:
-            reader = PyPDF2.PdfReader(pdf_file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+        text = parse_executor.run(extract_text, file_path)
         # Normalize text for consistency
-        return ' '.join(text.strip().split())
+        return ' '.join(text.split()) if normalize else text
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return ""
 
-def process_jd(cv_text: str, jd_path: str) -> Dict:
-    """Process one JD with error handling"""
+def embedding_score(cv_text: str, jd_text: str) -> float:
+    """Best-effort score from the semantic similarity of CV and JD text"""
+    cv_embedding = np.array(generate_embedding(cv_text))
+    jd_embedding = np.array(generate_embedding(jd_text))
+    similarity = np.dot(cv_embedding, jd_embedding) / (np.linalg.norm(cv_embedding) * np.linalg.norm(jd_embedding))
+    return round(max(0.0, min(100.0, float(similarity) * 100)), 2)
+
+# Pause before each scoring call to stay under the LLM rate limit
+LLM_SCORING_PAUSE = 4
+
+def llm_match_score(prompt: str, deadline: Optional[Deadline] = None) -> float:
+    """Ask the LLM for the match score of one CV/JD prompt
+
+    The rate-limit pause counts against ``deadline``; the call gets whatever
+    time is left after it.
+    """
+    deadline = deadline or Deadline()
+    remaining = deadline.remaining()
+    if remaining is not None and remaining <= LLM_SCORING_PAUSE:
+        raise TimeoutError("Deadline leaves no time for the LLM call after the rate-limit pause")
+    time.sleep(LLM_SCORING_PAUSE)
+    response = completion(
+        model="gemini/gemini-2.0-flash",
+        messages=[{"role": "user", "content": prompt}],
+        api_key=GEMINI_API_KEY,
+        response_format={"type": "json_object"},
+        temperature=0.1,  
+        verbose = False,
+        max_tokens=100,
+        timeout=deadline.remaining()
+    )
+    
+    content = json.loads(response.choices[0].message.content)
+    return max(0.0, min(100.0, float(content["Match_score"])))
+
+def process_jd(cv_text: str, jd_path: str, cv_profile: Optional[Dict] = None, deadline: Optional[Deadline] = None) -> Dict:
+    """Process one JD with error handling.
+
+    When a structured CV profile is given the score is computed locally and
+    the LLM is only used if the CV or JD data is incomplete. If the LLM call
+    does not fit in the deadline an embedding similarity score is returned.
+    """
+    deadline = deadline or Deadline()
     jd_text = extract_text_from_pdf(jd_path)
     if not jd_text:
         return {"jd_file": os.path.basename(jd_path), "score": 0.0, "error": "Empty JD"}
+
+    if cv_profile is not None:
+        score = score_locally(cv_profile, jd_profile(jd_text))
+        if score is not None:
+            return {"jd_file": os.path.basename(jd_path), "score": score, "method": "local"}
     
+    if not deadline.allows("llm_scoring"):
+        deadline.skip("llm_scoring")
+        return {"jd_file": os.path.basename(jd_path), "score": cpu_executor.run(embedding_score, cv_text, jd_text), "method": "embedding"}
+
     prompt = f"{PROMPT_TEMPLATE}\nCV:\n{cv_text}\nJD:\n{jd_text}"
     
     try:
-        time.sleep(4) 
-        response = completion(
-            model="gemini/gemini-2.0-flash",
-            messages=[{"role": "user", "content": prompt}],
-            api_key=GEMINI_API_KEY,
-            response_format={"type": "json_object"},
-            temperature=0.1,  
-            verbose = False,
-            max_tokens=100
-        )
-        
-        content = json.loads(response.choices[0].message.content)
-        score = max(0.0, min(100.0, float(content["Match_score"])))
+        start = time.monotonic()
+        score = llm_executor.run(llm_match_score, prompt, deadline)
+        record_stage_duration("llm_scoring", time.monotonic() - start)
         
         return {
             "jd_file": os.path.basename(jd_path),
             "score": score,
+            "method": "llm",
             # "tokens": response.usage.dict()
         }
     except Exception as e:
+        if deadline.remaining() is not None:
+            deadline.skip("llm_scoring")
+            return {"jd_file": os.path.basename(jd_path), "score": cpu_executor.run(embedding_score, cv_text, jd_text), "method": "embedding", "error": str(e)}
         return {"jd_file": os.path.basename(jd_path), "score": 0.0, "error": str(e)}
 
-def score_jds(jd_paths: List[str], cv_path: str) -> Tuple[List[Dict], Dict]:
-    """Score all JDs against one CV with token tracking"""
-    cv_text = extract_text_from_pdf(cv_path)
+def score_jds(jd_paths: List[str], cv_path: str, deadline: Optional[Deadline] = None) -> Tuple[List[Dict], Dict]:
+    """Score all JDs against one CV with token tracking.
+
+    Stages skipped to meet ``deadline`` are recorded in ``deadline.skipped``.
+    """
+    deadline = deadline or Deadline()
+    # Keep the line structure for the local parser
+    cv_raw_text = extract_text_from_pdf(cv_path, normalize=False)
+    cv_text = ' '.join(cv_raw_text.split())
     if not cv_text:
         raise ValueError("CV text extraction failed")
     
+    # Structure the CV once so every JD can be scored locally
+    cv_profile = None
+    cv_json, confidence = parse_executor.run(parse_cv, cv_raw_text)
+    if confidence >= CV_PARSER_CONFIDENCE:
+        cv_profile = build_cv_profile(cv_json)
+    elif deadline.allows("llm_extraction"):
+        try:
+            start = time.monotonic()
+            cv_json, _, _ = llm_executor.run(generate_json_from_text, cv_text, timeout=deadline.remaining())
+            record_stage_duration("llm_extraction", time.monotonic() - start)
+            cv_profile = build_cv_profile(cv_json)
+        except Exception as e:
+            print(f"CV structuring failed, using LLM scoring: {e}")
+    else:
+        deadline.skip("llm_extraction")
+
     results = []
     # total_tokens = {"input": 0, "output": 0}
     
     # Process each JD in sequence
     for jd_path in jd_paths:
-        result = process_jd(cv_text, jd_path)
+        result = process_jd(cv_text, jd_path, cv_profile, deadline)
         results.append(result)
         
         # if "tokens" in result:
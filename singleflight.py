@@ -0,0 +1,81 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Set to 0 to run every call on its own (e.g. when load testing with repeated files)
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one execution (threads).
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result or exception. Nothing is
+    cached once the call completes.
+    """
+
+    def __init__(self, enabled: bool = COALESCE_REQUESTS):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, wait_timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` or join the call already in flight for ``key``.
+
+        A caller that joins waits at most ``wait_timeout`` seconds and then
+        raises TimeoutError; the shared call keeps running for the others.
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(timeout=wait_timeout)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutines with the same key (event loop).
+
+    The shared call runs as its own task, so cancelling any caller, the
+    first one included, leaves it running for the others. Waiting requests
+    do not hold a worker thread.
+    """
+
+    def __init__(self, enabled: bool = COALESCE_REQUESTS):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """``fn`` is only called, synchronously, by the first caller for a key."""
+        if not self.enabled:
+            return await fn()
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: a cancelled caller must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
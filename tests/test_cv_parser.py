@@ -0,0 +1,26 @@
+from datetime import date
+
+from cv_parser import experience_years, parse_cv
+
+
+def test_year_range_is_not_taken_for_a_phone_number():
+    cv_json, _ = parse_cv("Jane Smith\nExperience\nML Engineer, Beta 2015 - 2018")
+    assert cv_json["phone"] is None
+
+
+def test_phone_after_a_date_range_is_found():
+    cv_json, _ = parse_cv("Jane Smith\nBeta 2015 - 2018\nPhone: +44 20 7946 0958")
+    assert cv_json["phone"] == "+44 20 7946 0958"
+
+
+def test_month_ranges_include_their_last_month():
+    assert experience_years(["Jan 2019 - Dec 2019"]) == (1.0, 1)
+    assert experience_years(["Jan 2019 - Dec 2019", "Jan 2020 - Jun 2020"]) == (1.5, 2)
+
+
+def test_year_only_ranges_count_whole_years():
+    assert experience_years(["2015 - 2018"]) == (3.0, 1)
+
+
+def test_present_includes_the_current_month():
+    assert experience_years(["Jan 2024 - Present"], today=date(2024, 12, 15)) == (1.0, 1)
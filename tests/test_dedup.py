@@ -0,0 +1,28 @@
+from dedup import LSHIndex, minhash_signature
+
+CV_TEXT = "Jane Smith senior data engineer with eight years of Python Spark and Airflow experience in fintech"
+
+
+def test_near_duplicate_is_matched():
+    index = LSHIndex()
+    assert index.query_or_add("a.pdf", minhash_signature(CV_TEXT)) is None
+    assert index.query_or_add("b.pdf", minhash_signature(CV_TEXT + " London")) == "a.pdf"
+
+
+def test_texts_without_enough_words_are_never_duplicates():
+    assert minhash_signature("") is None
+    assert minhash_signature("Curriculum Vitae") is None
+    index = LSHIndex()
+    assert index.query_or_add("scan1.pdf", minhash_signature("")) is None
+    assert index.query_or_add("scan2.pdf", minhash_signature("")) is None
+    assert index.signatures == {}
+
+
+def test_earlier_upload_replaces_later_representative():
+    index = LSHIndex()
+    assert index.query_or_add("b.pdf", minhash_signature(CV_TEXT), order=1) is None
+    assert index.query_or_add("a.pdf", minhash_signature(CV_TEXT + " London"), order=0) is None
+    assert index.superseded == {"b.pdf": "a.pdf"}
+    assert index.representative("b.pdf") == "a.pdf"
+    assert index.query_or_add("c.pdf", minhash_signature(CV_TEXT), order=2) == "a.pdf"
+    assert set(index.signatures) == {"a.pdf"}
@@ -0,0 +1,14 @@
+from cv_parser import parse_cv
+from executors import BoundedExecutor
+from parse_worker import read_cv
+
+CV_TEXT = "Jane Smith\njane@example.com\nSenior data engineer with eight years of Python Spark and Airflow experience"
+
+
+def test_process_pool_reads_and_parses_cvs():
+    executor = BoundedExecutor("test-parse", 2, 0, processes=True)
+    text, signature = executor.run(read_cv, CV_TEXT.encode())
+    assert text == CV_TEXT
+    assert signature is not None
+    cv_json, _ = executor.run(parse_cv, text)
+    assert cv_json == parse_cv(text)[0]
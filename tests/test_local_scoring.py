@@ -0,0 +1,23 @@
+from local_scoring import education_level, required_experience
+
+
+def test_job_titles_are_not_education_requirements():
+    assert education_level("We are hiring a Scrum Master") is None
+    assert education_level("Associate Software Engineer, secondary responsibilities include QA") is None
+
+
+def test_degree_context_sets_education_level():
+    assert education_level("Master's degree in Computer Science") == 4
+    assert education_level("Master of Science or PhD") == 5
+    assert education_level("Associate degree required") == 2
+
+
+def test_required_experience_ignores_unrelated_year_counts():
+    assert required_experience("10 years in ML; company with 2 yrs history") == 10.0
+    assert required_experience("Founded 12 years ago, we build fintech tools") is None
+
+
+def test_required_experience_takes_the_largest_requirement():
+    assert required_experience("5+ years of experience, 2 years of AWS") == 5.0
+    assert required_experience("3-5 years of experience with Python") == 3.0
+    assert required_experience("Experience: 4 years") == 4.0
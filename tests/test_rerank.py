@@ -0,0 +1,72 @@
+from rerank import llm_order, rerank_windows, tournament_rerank, window_order
+
+
+def preferring(*favourites):
+    """Stub LLM that ranks ``favourites`` first and keeps the given order otherwise."""
+    calls = []
+
+    def rank_windows(groups):
+        calls.append(groups)
+        return [sorted(group, key=lambda name: (name not in favourites, favourites.index(name) if name in favourites else 0)) for group in groups]
+
+    rank_windows.calls = calls
+    return rank_windows
+
+
+def test_rerank_windows_are_balanced_and_cover_count():
+    assert rerank_windows(12, 5) == [(0, 4), (4, 8), (8, 12)]
+    assert rerank_windows(21, 10) == [(0, 7), (7, 14), (14, 21)]
+    assert rerank_windows(5, 5) == [(0, 5)]
+    assert rerank_windows(0, 5) == []
+
+
+def test_window_order_drops_unknown_names_and_appends_missing_members():
+    assert window_order(["a", "b", "c"], ["c", "x", "c", "a"]) == ["c", "a", "b"]
+
+
+def test_llm_order_tolerates_malformed_rankings():
+    ranking = {"ranked_cvs": [
+        {"filename": "b", "ranking": "2"},
+        {"filename": "c", "ranking": "first"},
+        {"filename": "a", "ranking": 1},
+        {"ranking": "3"},
+        "d",
+    ]}
+    assert llm_order(ranking) == ["a", "b", "c"]
+    assert llm_order({"ranked_cvs": "none"}) == []
+    assert llm_order(None) == []
+
+
+def test_deep_candidate_reaches_the_top():
+    names = [f"cv{i}" for i in range(1, 51)]
+    for favourite in ("cv31", "cv6", "cv50"):
+        merged = tournament_rerank(names, preferring(favourite), window=10)
+        assert merged[0] == favourite
+        assert sorted(merged) == sorted(names)
+
+
+def test_depth_fifty_takes_two_rounds():
+    names = [f"cv{i}" for i in range(1, 51)]
+    rank_windows = preferring()
+    tournament_rerank(names, rank_windows, window=10)
+    assert [len(groups) for groups in rank_windows.calls] == [5, 1]
+    assert len(rank_windows.calls[1][0]) == 10
+
+
+def test_two_favourites_take_the_first_two_places():
+    names = [f"cv{i}" for i in range(1, 51)]
+    merged = tournament_rerank(names, preferring("cv40", "cv12"), window=10)
+    assert merged[:2] == ["cv40", "cv12"]
+
+
+def test_without_preferences_embedding_order_is_kept_at_the_top():
+    names = [f"cv{i}" for i in range(1, 21)]
+    merged = tournament_rerank(names, preferring(), window=10)
+    assert merged[:2] == ["cv1", "cv2"]
+    assert sorted(merged) == sorted(names)
+
+
+def test_single_window_is_ranked_once():
+    rank_windows = preferring("c")
+    assert tournament_rerank(["a", "b", "c"], rank_windows, window=5) == ["c", "a", "b"]
+    assert len(rank_windows.calls) == 1
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight, calls, release = SingleFlight(), [], threading.Event()
+
+    def work():
+        calls.append(1)
+        release.wait(1)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_exception_is_shared_and_nothing_is_cached():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_joining_caller_stops_waiting_after_its_timeout():
+    flight, release = SingleFlight(), threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("key", release.wait, 2))
+    leader.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flight.do("key", release.wait, 2, wait_timeout=0.1)
+    assert time.monotonic() - start < 0.5
+    release.set()
+    leader.join()
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    async def main():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        others = [asyncio.ensure_future(flight.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await asyncio.gather(*others) == ["result"] * 3
+        assert first.cancelled()
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+
+def test_async_exception_is_shared():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(main())
@@ -0,0 +1,18 @@
+import pytest
+
+from text_extraction import detect_format, extract_text
+
+
+def test_pdf_header_is_found_after_leading_bytes():
+    assert detect_format(b"\xef\xbb\xbf\r\n%PDF-1.4\n...") == "pdf"
+
+
+def test_utf8_and_latin1_text_are_read_as_text():
+    assert extract_text("Résumé\nJane Smith".encode("latin-1")) == "Résumé\nJane Smith"
+    assert extract_text("Résumé\nJane Smith".encode("utf-8")) == "Résumé\nJane Smith"
+
+
+def test_unknown_binary_formats_are_rejected():
+    legacy_doc = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 64
+    with pytest.raises(ValueError):
+        extract_text(legacy_doc, filename="cv.doc")
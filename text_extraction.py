@@ -0,0 +1,227 @@
+"""Document text extraction with pluggable PDF backends.
+
+PDF backends are registered when their package is installed. In "auto"
+mode the first PDF extracted is used to calibrate: every backend runs on
+it and the fastest one producing acceptable text is kept. DOCX and TXT
+files are handled natively without any PDF library.
+
+    python text_extraction.py sample1.pdf sample2.pdf   # print a calibration report
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+import threading
+from typing import Callable, Dict, List, Optional, Union
+from xml.etree import ElementTree
+
+# Backend name or "auto" to calibrate on the first PDF
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+# CVs rarely need more than the first few pages; 0 disables the limit
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+# Stop reading further pages once this much text has been extracted
+MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", "100000"))
+# A backend's text is acceptable if it is at least this share of the longest result
+MIN_TEXT_RATIO = 0.8
+
+PDF_BACKENDS: Dict[str, Callable[[bytes, int], str]] = {}
+
+
+def _page_limit(max_pages: int, page_count: int) -> int:
+    return min(max_pages, page_count) if max_pages else page_count
+
+
+def _join_pages(pages) -> str:
+    """Join page texts, stopping early once MAX_TEXT_CHARS is reached."""
+    texts, size = [], 0
+    for text in pages:
+        if text:
+            texts.append(text)
+            size += len(text)
+            if size >= MAX_TEXT_CHARS:
+                break
+    return "\n".join(texts)
+
+
+try:
+    import PyPDF2
+
+    def _extract_pypdf2(data: bytes, max_pages: int) -> str:
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        pages = reader.pages
+        return _join_pages(pages[i].extract_text() for i in range(_page_limit(max_pages, len(pages))))
+
+    PDF_BACKENDS["pypdf2"] = _extract_pypdf2
+except ImportError:
+    pass
+
+try:
+    import pypdf
+
+    def _extract_pypdf(data: bytes, max_pages: int) -> str:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        pages = reader.pages
+        return _join_pages(pages[i].extract_text() for i in range(_page_limit(max_pages, len(pages))))
+
+    PDF_BACKENDS["pypdf"] = _extract_pypdf
+except ImportError:
+    pass
+
+try:
+    from pdfminer.high_level import extract_text as _pdfminer_extract_text
+
+    def _extract_pdfminer(data: bytes, max_pages: int) -> str:
+        return _pdfminer_extract_text(io.BytesIO(data), maxpages=max_pages)[:MAX_TEXT_CHARS]
+
+    PDF_BACKENDS["pdfminer"] = _extract_pdfminer
+except ImportError:
+    pass
+
+try:
+    import pypdfium2
+
+    def _extract_pypdfium2(data: bytes, max_pages: int) -> str:
+        document = pypdfium2.PdfDocument(data)
+        try:
+            def pages():
+                for i in range(_page_limit(max_pages, len(document))):
+                    page = document[i]
+                    textpage = page.get_textpage()
+                    yield textpage.get_text_range()
+                    textpage.close()
+                    page.close()
+            return _join_pages(pages())
+        finally:
+            document.close()
+
+    PDF_BACKENDS["pypdfium2"] = _extract_pypdfium2
+except ImportError:
+    pass
+
+
+_selected_backend: Optional[str] = None if PDF_BACKEND == "auto" else PDF_BACKEND
+_selection_lock = threading.Lock()
+
+
+def _acceptable(text: str, reference_length: int) -> bool:
+    if not text.strip():
+        return False
+    printable = sum(ch.isprintable() or ch.isspace() for ch in text) / len(text)
+    return printable >= 0.95 and len(text) >= MIN_TEXT_RATIO * reference_length
+
+
+def calibrate(samples: List[bytes], max_pages: int = PDF_MAX_PAGES) -> Dict:
+    """Time every installed backend on the sample PDFs and pick the fastest acceptable one."""
+    report = {}
+    outputs = {}
+    for name, backend in PDF_BACKENDS.items():
+        start = time.perf_counter()
+        try:
+            outputs[name] = [backend(sample, max_pages) or "" for sample in samples]
+            report[name] = {"seconds": time.perf_counter() - start}
+        except Exception as e:
+            report[name] = {"error": str(e)}
+
+    longest = [max((len(texts[i]) for texts in outputs.values()), default=0) for i in range(len(samples))]
+    for name, texts in outputs.items():
+        report[name]["acceptable"] = all(_acceptable(text, longest[i]) for i, text in enumerate(texts))
+
+    candidates = [name for name in outputs if report[name]["acceptable"]]
+    best = min(candidates, key=lambda name: report[name]["seconds"]) if candidates else None
+    return {"selected": best, "backends": report}
+
+
+def pdf_backend(sample: Optional[bytes] = None) -> str:
+    """Return the backend in use, calibrating on ``sample`` on first use in auto mode."""
+    global _selected_backend
+    if _selected_backend in PDF_BACKENDS:
+        return _selected_backend
+    if not PDF_BACKENDS:
+        raise RuntimeError("No PDF backend installed (PyPDF2, pypdf, pdfminer.six or pypdfium2).")
+    with _selection_lock:
+        if _selected_backend not in PDF_BACKENDS:
+            if _selected_backend is not None:
+                print(f"PDF backend {_selected_backend!r} is not installed, calibrating instead")
+            selected = calibrate([sample])["selected"] if sample is not None else None
+            # Fall back to the historical default if nothing passed calibration
+            _selected_backend = selected or ("pypdf2" if "pypdf2" in PDF_BACKENDS else next(iter(PDF_BACKENDS)))
+            print(f"Using PDF backend: {_selected_backend}")
+    return _selected_backend
+
+
+def extract_docx(data: bytes) -> str:
+    """Paragraph text of a DOCX file, read straight from its XML."""
+    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{namespace}p"):
+        text = "".join(node.text or "" for node in paragraph.iter(f"{namespace}t"))
+        if text:
+            paragraphs.append(text)
+    return "\n".join(paragraphs)[:MAX_TEXT_CHARS]
+
+
+def extract_txt(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")[:MAX_TEXT_CHARS]
+    except UnicodeDecodeError:
+        return data.decode("latin-1")[:MAX_TEXT_CHARS]
+
+
+def _looks_like_text(sample: bytes) -> bool:
+    """No NUL bytes and almost no control characters, as in UTF-8 or Latin-1 text."""
+    if b"\x00" in sample:
+        return False
+    control = sum(byte < 32 and byte not in b"\t\n\r\f\b" for byte in sample)
+    return control <= 0.05 * len(sample)
+
+
+def detect_format(data: bytes, filename: Optional[str] = None) -> str:
+    """Detect pdf, docx or txt from the file's magic bytes (extension as a tie-breaker).
+
+    Like PDF readers, the ``%PDF-`` header is searched for in the first 1 KB.
+    Other binary formats, such as legacy .doc files, raise ValueError.
+    """
+    if b"%PDF-" in data[:1024]:
+        return "pdf"
+    if data[:4] == b"PK\x03\x04":
+        return "docx"
+    if filename and filename.lower().endswith(".pdf"):
+        return "pdf"
+    if _looks_like_text(data[:4096]):
+        return "txt"
+    raise ValueError(f"Unsupported document format{f' for {filename}' if filename else ''}: expected PDF, DOCX or text")
+
+
+def extract_text(source: Union[str, os.PathLike, bytes, io.BytesIO], filename: Optional[str] = None,
+                 max_pages: int = PDF_MAX_PAGES) -> str:
+    """Extract text from a PDF, DOCX or TXT given as a path, bytes or BytesIO."""
+    if isinstance(source, (str, os.PathLike)):
+        filename = filename or os.fspath(source)
+        with open(source, "rb") as f:
+            data = f.read()
+    elif isinstance(source, io.BytesIO):
+        data = source.getvalue()
+    elif isinstance(source, bytes):
+        data = source
+    else:
+        raise TypeError("Invalid source type. Expected file path, bytes or BytesIO object.")
+
+    document_format = detect_format(data, filename)
+    if document_format == "docx":
+        return extract_docx(data).strip()
+    if document_format == "txt":
+        return extract_txt(data).strip()
+    return PDF_BACKENDS[pdf_backend(data)](data, max_pages).strip()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(f"usage: python {sys.argv[0]} sample.pdf [sample.pdf ...]")
+    samples = [open(path, "rb").read() for path in sys.argv[1:]]
+    result = calibrate(samples)
+    for name, stats in result["backends"].items():
+        print(f"{name:<10} {stats}")
+    print(f"Selected: {result['selected']}")